@@ -1,6 +1,9 @@
 from flask import Flask, render_template, request, jsonify, send_from_directory
+import hashlib
 import os
 import logging
+import re
+import tempfile
 
 app = Flask(__name__)
 app.static_folder = 'static'
@@ -8,12 +11,86 @@ app.static_folder = 'static'
 # Set up logging
 logging.basicConfig(level=logging.DEBUG)
 
+# Uploads are read in chunks of this many bytes, so memory use does not
+# grow with the file size
+UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_SIZE', 1024 * 1024))
+# Content-addressed store for uploads, one file per distinct SHA-256.
+# Unset to only compute size and hash without keeping anything
+UPLOAD_STORE_DIR = os.environ.get('UPLOAD_STORE_DIR')
+# Clients may send the SHA-256 of the file in this header; if it is already
+# stored, the upload is answered without reading the body
+HASH_HEADER = 'X-Content-SHA256'
+SHA256_HEX = re.compile(r'^[0-9a-f]{64}$')
+
+def store_path(digest):
+    """Path of a stored upload, fanned out by the first two hex digits"""
+    return os.path.join(UPLOAD_STORE_DIR, digest[:2], digest)
+
+class DigestMismatch(ValueError):
+    """Raised by consume_upload when the upload does not hash to the expected digest"""
+
+def consume_upload(stream, expected=None):
+    """
+    Read an upload in UPLOAD_CHUNK_SIZE chunks and return its
+    (size, sha256 hex digest, duplicate). With UPLOAD_STORE_DIR set, the
+    bytes are written to the store in the same pass; duplicate is True when
+    that content was already stored, in which case the new copy is dropped.
+    If expected is given and the digest differs, nothing is stored and
+    DigestMismatch is raised.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    tmp = None
+    if UPLOAD_STORE_DIR:
+        os.makedirs(UPLOAD_STORE_DIR, exist_ok=True)
+        tmp = tempfile.NamedTemporaryFile(dir=UPLOAD_STORE_DIR, suffix='.part', delete=False)
+    try:
+        for chunk in iter(lambda: stream.read(UPLOAD_CHUNK_SIZE), b''):
+            digest.update(chunk)
+            size += len(chunk)
+            if tmp is not None:
+                tmp.write(chunk)
+        sha256 = digest.hexdigest()
+        if expected and expected != sha256:
+            raise DigestMismatch(sha256)
+        if tmp is None:
+            return size, sha256, False
+        tmp.close()
+        path = store_path(sha256)
+        if os.path.exists(path):
+            os.remove(tmp.name)
+            return size, sha256, True
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp.name, path)
+        return size, sha256, False
+    except BaseException:
+        if tmp is not None:
+            tmp.close()
+            if os.path.exists(tmp.name):
+                os.remove(tmp.name)
+        raise
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
 @app.route('/upload', methods=['POST'])
 def upload_file():
+    claimed = request.headers.get(HASH_HEADER, '').lower()
+    if claimed and not SHA256_HEX.match(claimed):
+        return jsonify({'error': f'{HASH_HEADER} must be a hex SHA-256 digest'}), 400
+
+    # Seen before: answer from the store without parsing the request body
+    if claimed and UPLOAD_STORE_DIR and os.path.exists(store_path(claimed)):
+        app.logger.debug(f"Upload {claimed} already stored, body not read")
+        return jsonify({
+            'filename': request.headers.get('X-Filename'),
+            'filesize': os.path.getsize(store_path(claimed)),
+            'filetype': None,
+            'sha256': claimed,
+            'duplicate': True
+        })
+
     if 'file' not in request.files:
         return jsonify({'error': 'No file part'}), 400
 
@@ -24,14 +101,19 @@ def upload_file():
 
     if file:
         filename = file.filename
-        filesize = len(file.read())
+        try:
+            filesize, sha256, duplicate = consume_upload(file.stream, expected=claimed)
+        except DigestMismatch:
+            return jsonify({'error': f'{HASH_HEADER} does not match the uploaded file'}), 400
         file.seek(0)  # Reset file pointer to the beginning
         filetype = file.content_type
 
         return jsonify({
             'filename': filename,
             'filesize': filesize,
-            'filetype': filetype
+            'filetype': filetype,
+            'sha256': sha256,
+            'duplicate': duplicate
         })
 
 @app.route('/static/images/<path:filename>')
@@ -1,24 +1,72 @@
-from flask import Flask, render_template, request, jsonify, send_from_directory
-from utils.preprocessor import preprocess_text, preprocess_image, preprocess_audio, preprocess_3d
-from utils.augmentor import augment_text, augment_image, augment_audio, augment_3d
+from flask import (Flask, Request, Response, render_template, request, jsonify,
+                   send_file, send_from_directory, stream_with_context)
+from utils.pipeline import (MODALITIES, run_item, stream_text, stream_audio, preload,
+                            modality_status)
+from utils.janitor import UploadJanitor
+from utils.batch import BatchProcessor, iter_batch_items
+from utils.result_cache import ResultCache, hash_source, make_key
+from utils import metrics
+from utils.jobs import JobQueue, QueueFull, FINISHED
+from utils.artifacts import ArtifactStore, MIMETYPES, finalize, pack_payload, unpack_payload
 import os
-import base64
-from PIL import Image
-import io
-import matplotlib
-matplotlib.use('Agg')  # Set the backend to non-interactive 'Agg'
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
-import librosa.display
-import IPython.display as ipd
-import numpy as np
-import soundfile as sf
-from plyfile import PlyData
 from datetime import datetime
+import tempfile
+import json
+
+# Uploads are decoded straight from the request body ('memory') unless the
+# disk copy is requested per upload (save_upload=true) or globally ('disk')
+UPLOAD_MODE = os.environ.get('UPLOAD_MODE', 'memory')
+# Uploads up to this size stay in RAM, larger ones spill to a temp file
+SPOOL_MAX_SIZE = int(os.environ.get('SPOOL_MAX_SIZE', 64 * 1024 * 1024))
+# Saved uploads are deleted after UPLOAD_TTL seconds, or oldest first once
+# the folder grows past UPLOAD_MAX_BYTES (0 means no cap)
+UPLOAD_TTL = int(os.environ.get('UPLOAD_TTL', 3600))
+UPLOAD_MAX_BYTES = int(os.environ.get('UPLOAD_MAX_BYTES', 0))
+JANITOR_INTERVAL = int(os.environ.get('JANITOR_INTERVAL', 60))
+# Process pool used by /process/batch. 0 means half the CPUs; /jobs gets
+# the other half, so the two pools do not oversubscribe the machine
+BATCH_WORKERS = int(os.environ.get('BATCH_WORKERS', 0)) or max(1, (os.cpu_count() or 1) // 2)
+BATCH_MAX_ITEM_BYTES = int(os.environ.get('BATCH_MAX_ITEM_BYTES', 100 * 1024 * 1024))
+# Responses are cached by upload hash + options. preprocess results are
+# cached when RESULT_CACHE_PREPROCESS is on, augment results only when the
+# request carries a seed. Set RESULT_CACHE_DIR to spill evictions to disk.
+RESULT_CACHE_BYTES = int(os.environ.get('RESULT_CACHE_BYTES', 128 * 1024 * 1024))
+RESULT_CACHE_DIR = os.environ.get('RESULT_CACHE_DIR', '')
+RESULT_CACHE_DISK_BYTES = int(os.environ.get('RESULT_CACHE_DISK_BYTES', 1024 * 1024 * 1024))
+RESULT_CACHE_PREPROCESS = os.environ.get('RESULT_CACHE_PREPROCESS', 'true').lower() == 'true'
+# Background jobs (/jobs): worker processes (0 means the CPUs not given to
+# the batch pool by default), how many jobs may wait before submissions get
+# 429, and how long finished jobs are kept
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 0)) or ((os.cpu_count() or 1) + 1) // 2
+JOB_MAX_QUEUED = int(os.environ.get('JOB_MAX_QUEUED', 32))
+JOB_TTL = int(os.environ.get('JOB_TTL', 600))
+# Binary outputs are returned as base64 data URIs ('inline') or stored
+# under uploads/artifacts and returned as URLs ('url'). Requests can
+# override this with the 'artifacts' form field.
+ARTIFACT_MODE = os.environ.get('ARTIFACT_MODE', 'inline')
+# Modalities (text,image,audio,3d or all) imported at startup instead of on
+# their first request
+PRELOAD_MODALITIES = [m for m in os.environ.get('PRELOAD_MODALITIES', '').split(',') if m]
+
+class SpooledRequest(Request):
+    """Request that buffers uploaded files in memory up to SPOOL_MAX_SIZE"""
+    def _get_file_stream(self, total_content_length, content_type, filename=None,
+                         content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE, mode='rb+')
+    
+    def detach_files(self):
+        """Keep uploads open past the view, the caller must close them"""
+        self._files_detached = True
+        return self.files
+    
+    def close(self):
+        if not getattr(self, '_files_detached', False):
+            super().close()
 
 app = Flask(__name__, 
            static_folder='static',
            template_folder='templates')  # Add template_folder explicitly
+app.request_class = SpooledRequest
 
 @app.route('/debug-static')
 def debug_static():
@@ -55,7 +103,7 @@ def create_upload_dirs():
         os.makedirs(UPLOAD_FOLDER, exist_ok=True)
         
         # Create subdirectories for each type
-        subdirs = ['texts', 'images', 'audio', '3d']  # Note: 'texts' not 'text'
+        subdirs = ['texts', 'images', 'audio', '3d', 'artifacts']  # Note: 'texts' not 'text'
         for subdir in subdirs:
             subdir_path = os.path.join(UPLOAD_FOLDER, subdir)
             os.makedirs(subdir_path, exist_ok=True)
@@ -65,8 +113,48 @@ def create_upload_dirs():
         print(f"Error creating directories: {str(e)}")
         raise
 
-# Call directory creation when app starts
-create_upload_dirs()
+# The batch and job pools start workers through multiprocessing, which
+# imports this file again as __mp_main__ in the forkserver and in every
+# worker. Only the serving process creates the upload dirs, runs the
+# janitor and preloads plugins.
+if __name__ != '__mp_main__':
+    # Call directory creation when app starts
+    create_upload_dirs()
+
+    # Expire old uploads in the background instead of on every request
+    janitor = UploadJanitor(UPLOAD_FOLDER, ttl=UPLOAD_TTL, max_bytes=UPLOAD_MAX_BYTES,
+                            interval=JANITOR_INTERVAL)
+    janitor.start()
+
+    preload(PRELOAD_MODALITIES)
+
+    batch_processor = BatchProcessor(max_workers=BATCH_WORKERS)
+
+    job_queue = JobQueue(max_workers=JOB_WORKERS, max_queued=JOB_MAX_QUEUED, ttl=JOB_TTL)
+
+    artifact_store = ArtifactStore(os.path.join(UPLOAD_FOLDER, 'artifacts'), janitor=janitor)
+
+    result_cache = ResultCache(max_bytes=RESULT_CACHE_BYTES, disk_dir=RESULT_CACHE_DIR or None,
+                               disk_max_bytes=RESULT_CACHE_DISK_BYTES)
+
+def parse_seed(value):
+    """Optional integer seed from a form field, raises ValueError if malformed"""
+    if value is None or value == '':
+        return None
+    return int(value)
+
+def output_store():
+    """The artifact store in 'url' mode, None for inline data URIs"""
+    mode = request.form.get('artifacts', ARTIFACT_MODE)
+    return artifact_store if mode == 'url' else None
+
+def is_cacheable(action, seed):
+    if not RESULT_CACHE_BYTES:
+        return False
+    if action == 'preprocess':
+        return RESULT_CACHE_PREPROCESS
+    # Augmentations are random unless the caller pins the seed
+    return seed is not None
 
 @app.route('/')
 def index():
@@ -87,228 +175,278 @@ def process():
         if not file.filename:
             return jsonify({'error': 'No file selected'}), 400
         
-        # Fix the directory name for text files
-        if input_type == 'text':
-            subdir = 'texts'  # Change from 'text' to 'texts'
-        else:
-            subdir = input_type + 's'
-            
-        # Generate unique filename
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"{timestamp}_{file.filename}"
-        
-        # Create full path and ensure directory exists
-        upload_dir = os.path.join(UPLOAD_FOLDER, subdir)
-        os.makedirs(upload_dir, exist_ok=True)  # Ensure directory exists
-        file_path = os.path.join(upload_dir, filename)
-        
-        print(f"Saving file to: {file_path}")  # Debug log
+        if input_type not in MODALITIES:
+            return jsonify({'error': 'Invalid input type'}), 400
         
-        # Save file
         try:
-            file.save(file_path)
-            print(f"File saved successfully to: {file_path}")
-        except Exception as e:
-            print(f"Error saving file: {str(e)}")
-            return jsonify({'error': f'Error saving file: {str(e)}'}), 500
+            seed = parse_seed(request.form.get('seed'))
+        except ValueError:
+            return jsonify({'error': 'Seed must be an integer'}), 400
         
-        # Process based on type
-        try:
-            if input_type == 'text':
-                return process_text(file_path, action)
-            elif input_type == 'image':
-                return process_image(file_path, action)
-            elif input_type == 'audio':
-                return process_audio(file_path, action)
-            elif input_type == '3d':
-                return process_3d(file_path, action)
-            else:
-                return jsonify({'error': 'Invalid input type'}), 400
-                
-        except Exception as e:
-            print(f"Error processing {input_type}: {str(e)}")
-            return jsonify({'error': f'Error processing {input_type}: {str(e)}'}), 500
+        if request.form.get('stream', 'false').lower() == 'true':
+            return stream_response(file, input_type, action)
+        
+        with metrics.labels(input_type, action):
+            return process_upload(file, input_type, action, seed)
             
     except Exception as e:
         print(f"Unexpected error: {str(e)}")
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
-def process_text(file_path, action):
-    with open(file_path, 'r') as f:
-        text = f.read()
+def process_upload(file, input_type, action, seed):
+    """Run one /process upload through the cache and its modality handler"""
+    file.stream.seek(0, os.SEEK_END)
+    metrics.observe_bytes('upload', file.stream.tell())
+    file.stream.seek(0)
     
-    if action == 'preprocess':
-        preprocessed_text = preprocess_text(text)
-        return jsonify({
-            'preprocessed_text': preprocessed_text
-        })
-    else:  # augment
-        augmented_text, changes = augment_text(text)
-        return jsonify({
-            'augmented_text': augmented_text,
-            'changes': changes
-        })
-
-def process_image(file_path, action):
+    save_upload = (UPLOAD_MODE == 'disk' or
+                   request.form.get('save_upload', 'false').lower() == 'true')
+    
+    # Saved before the cache lookup so a requested disk copy is written on
+    # cache hits too
+    if save_upload:
+        try:
+            with metrics.stage('save'):
+                source = save_uploaded_file(file, input_type)
+        except Exception as e:
+            print(f"Error saving file: {str(e)}")
+            return jsonify({'error': f'Error saving file: {str(e)}'}), 500
+    else:
+        # Decode directly from the spooled request buffer
+        source = file.stream
+        source.seek(0)
+    
+    cache_key = None
+    if is_cacheable(action, seed):
+        with metrics.stage('cache_lookup'):
+            cache_key = make_key(hash_source(source), input_type, action, {'seed': seed})
+            cached = result_cache.get(cache_key)
+        if cached is not None:
+            print(f"Cache hit for {input_type} {action}")
+            return finish_response(unpack_payload(cached))
+    
+    # Process based on type
     try:
-        image = Image.open(file_path)
-        
-        if action == 'preprocess':
-            processed_image, display_info = preprocess_image(image)
-            
-            # Save processed image
-            buffer = io.BytesIO()
-            processed_image.save(buffer, format='PNG')
-            buffer.seek(0)
-            image_base64 = base64.b64encode(buffer.getvalue()).decode()
-            
-            return jsonify({
-                'preprocessed_image': f'data:image/png;base64,{image_base64}',
-                'display_info': display_info
-            })
-            
-        else:  # augment
-            augmented_image = augment_image(image)
-            
-            buffer = io.BytesIO()
-            augmented_image.save(buffer, format='PNG')
-            buffer.seek(0)
-            image_base64 = base64.b64encode(buffer.getvalue()).decode()
-            
-            return jsonify({
-                'augmented_image': f'data:image/png;base64,{image_base64}'
-            })
-            
+        with metrics.stage('process'):
+            payload = run_item(input_type, action, source, seed=seed)
     except Exception as e:
-        print(f"Error processing image: {str(e)}")
-        return jsonify({'error': str(e)}), 400
+        print(f"Error processing {input_type}: {str(e)}")
+        return jsonify({'error': f'Error processing {input_type}: {str(e)}'}), 400
+    
+    if cache_key is not None:
+        # Cached with raw artifact bytes, so hits can be served in either mode
+        result_cache.put(cache_key, pack_payload(payload))
+    return finish_response(payload)
 
-def process_audio(file_path, action):
+def finish_response(payload):
+    """Encode artifacts (data URIs or stored files) and serialize the payload"""
+    with metrics.stage('finalize'):
+        response = jsonify(finalize(payload, output_store()))
+    metrics.observe_bytes('response', response.content_length)
+    return response
+
+def stream_response(file, input_type, action):
+    """Process a large text or audio upload in chunks and stream the result back"""
+    if input_type not in ('text', 'audio') or action != 'preprocess':
+        return jsonify({'error': 'Streaming is only supported for text and audio preprocessing'}), 400
+    
+    if input_type == 'audio':
+        return stream_audio_response(file, action)
+    
+    # The upload is read while the response streams, after the view has returned
+    request.detach_files()
+    source = file.stream
+    source.seek(0)
+    
+    def generate():
+        try:
+            for piece in stream_text(source, action):
+                yield piece.encode('utf-8')
+        finally:
+            file.close()
+    
+    return Response(stream_with_context(generate()), mimetype='text/plain; charset=utf-8')
+
+def stream_audio_response(file, action):
+    """
+    Preprocess audio block by block into a WAV under uploads/audio and send
+    it back, so long recordings are never decoded into memory at once
+    """
+    source = file.stream
+    source.seek(0)
+    fd, output_path = tempfile.mkstemp(dir=os.path.join(UPLOAD_FOLDER, 'audio'),
+                                       prefix='preprocessed_', suffix='.wav')
+    os.close(fd)
     try:
-        audio_data, sr = librosa.load(file_path)
-        
-        if action == 'preprocess':
-            processed_audio, vis_buffer = preprocess_audio(audio_data, sr)
-            
-            # Convert visualization buffer to base64
-            vis_base64 = base64.b64encode(vis_buffer.getvalue()).decode()
-            
-            # Create audio buffer
-            audio_buffer = io.BytesIO()
-            sf.write(audio_buffer, processed_audio, sr, format='WAV')
-            audio_buffer.seek(0)
-            audio_base64 = base64.b64encode(audio_buffer.getvalue()).decode()
-            
-            return jsonify({
-                'visualizations': f'data:image/png;base64,{vis_base64}',
-                'preprocessed_audio': f'data:audio/wav;base64,{audio_base64}'
-            })
-            
-        else:  # augment
-            augmented_audio = augment_audio(audio_data)
-            
-            # Generate visualizations
-            plt.figure(figsize=(10, 6))
-            
-            plt.subplot(2, 1, 1)
-            librosa.display.waveshow(augmented_audio, sr=sr)
-            plt.title("Augmented Audio Waveform")
-            
-            plt.subplot(2, 1, 2)
-            spec = librosa.feature.melspectrogram(y=augmented_audio, sr=sr)
-            librosa.display.specshow(librosa.power_to_db(spec, ref=np.max),
-                                   y_axis='mel', x_axis='time')
-            plt.title("Augmented Mel Spectrogram")
-            plt.tight_layout()
-            
-            vis_buffer = io.BytesIO()
-            plt.savefig(vis_buffer, format='png')
-            vis_buffer.seek(0)
-            vis_base64 = base64.b64encode(vis_buffer.getvalue()).decode()
-            plt.close()
-            
-            audio_buffer = io.BytesIO()
-            sf.write(audio_buffer, augmented_audio, sr, format='WAV')
-            audio_buffer.seek(0)
-            audio_base64 = base64.b64encode(audio_buffer.getvalue()).decode()
-            
-            return jsonify({
-                'visualizations': f'data:image/png;base64,{vis_base64}',
-                'augmented_audio': f'data:audio/wav;base64,{audio_base64}'
-            })
-            
+        sample_rate, frames = stream_audio(source, action, output_path)
     except Exception as e:
         print(f"Error processing audio: {str(e)}")
-        return jsonify({'error': str(e)}), 400
+        os.remove(output_path)
+        return jsonify({'error': f'Error processing audio: {str(e)}'}), 400
+    janitor.track(output_path)
+    print(f"Streamed audio preprocess - {frames} frames at {sample_rate} Hz")
+    return send_file(os.path.abspath(output_path), mimetype='audio/wav',
+                     download_name='preprocessed.wav')
+
+@app.route('/process/batch', methods=['POST'])
+def process_batch():
+    """
+    Process many files, or the members of a zip archive, on the process pool.
+    Results are streamed back as NDJSON, one line per item as it finishes.
+    """
+    input_type = request.form.get('input_type', 'auto')
+    action = request.form.get('action')
+    try:
+        seed = parse_seed(request.form.get('seed'))
+    except ValueError:
+        return jsonify({'error': 'Seed must be an integer'}), 400
+    
+    files = [f for f in request.files.getlist('files') + request.files.getlist('file')
+             if f.filename]
+    if not files:
+        return jsonify({'error': 'No file provided'}), 400
+    if input_type != 'auto' and input_type not in MODALITIES:
+        return jsonify({'error': 'Invalid input type'}), 400
+    
+    store = output_store()
+    # Files are read while the response streams, after the view has returned
+    uploads = request.detach_files()
+    
+    print(f"Processing batch - Files: {len(files)}, Type: {input_type}, Action: {action}")
+    
+    def generate():
+        items = iter_batch_items(files, input_type, BATCH_MAX_ITEM_BYTES)
+        try:
+            for result in batch_processor.run(items, action, seed=seed):
+                if result['status'] == 'ok':
+                    result['result'] = finalize(result['result'], store)
+                yield json.dumps(result) + '\n'
+        except Exception as e:
+            print(f"Error processing batch: {str(e)}")
+            yield json.dumps({'status': 'error', 'error': str(e)}) + '\n'
+        finally:
+            for _, file in uploads.items(multi=True):
+                file.close()
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """
+    Queue a /process request and return 202 with the job id straight away.
+    Poll /jobs/<id> or subscribe to /jobs/<id>/events for the result.
+    """
+    input_type = request.form.get('input_type')
+    action = request.form.get('action')
+    file = request.files.get('file')
+    if file is None or not file.filename:
+        return jsonify({'error': 'No file provided'}), 400
+    if input_type not in MODALITIES:
+        return jsonify({'error': 'Invalid input type'}), 400
+    try:
+        seed = parse_seed(request.form.get('seed'))
+    except ValueError:
+        return jsonify({'error': 'Seed must be an integer'}), 400
+    
+    data = file.stream.read(BATCH_MAX_ITEM_BYTES + 1)
+    if len(data) > BATCH_MAX_ITEM_BYTES:
+        return jsonify({'error': 'File too large'}), 413
+    
+    store = output_store()
+    try:
+        job_id = job_queue.submit(input_type, action, file.filename, data, seed=seed,
+                                  finalize=lambda payload: finalize(payload, store))
+    except QueueFull as e:
+        response = jsonify({'error': f'Job queue is full: {str(e)}'})
+        response.headers['Retry-After'] = '5'
+        return response, 429
+    
+    print(f"Queued job {job_id} - Type: {input_type}, Action: {action}")
+    response = jsonify({'job_id': job_id, 'status_url': f'/jobs/{job_id}',
+                        'events_url': f'/jobs/{job_id}/events'})
+    response.headers['Location'] = f'/jobs/{job_id}'
+    return response, 202
+
+@app.route('/jobs/metrics')
+def job_metrics():
+    """Queue depth, busy workers, outcome counters and average timings"""
+    return jsonify(job_queue.metrics())
 
-def process_3d(file_path, action):
-    """Process 3D point cloud data"""
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown or expired job'}), 404
+    return jsonify(job)
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
     try:
-        # Read 3D data from saved file
-        plydata = PlyData.read(file_path)
-        vertex = plydata['vertex']
-        points = np.vstack([vertex['x'], vertex['y'], vertex['z']]).T
+        job = job_queue.cancel(job_id)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 409
+    if job is None:
+        return jsonify({'error': 'Unknown or expired job'}), 404
+    return jsonify(job)
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    """Server-sent events: one event per status change until the job finishes"""
+    if job_queue.get(job_id) is None:
+        return jsonify({'error': 'Unknown or expired job'}), 404
+    
+    def generate():
+        version = None
+        while True:
+            job, new_version = job_queue.wait(job_id, version, timeout=15)
+            if job is None:
+                return
+            if new_version == version:
+                yield ': keep-alive\n\n'
+                continue
+            version = new_version
+            yield f"event: {job['status']}\ndata: {json.dumps(job)}\n\n"
+            if job['status'] in FINISHED:
+                return
+    
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache'})
+
+def save_uploaded_file(file, input_type):
+    """Write the upload to uploads/<type>s/ and return the saved path"""
+    # Fix the directory name for text files
+    if input_type == 'text':
+        subdir = 'texts'  # Change from 'text' to 'texts'
+    else:
+        subdir = input_type + 's'
         
-        if action == 'preprocess':
-            processed_points = preprocess_3d(points)
-            
-            # Generate visualization
-            fig = plt.figure(figsize=(10, 6))
-            ax = fig.add_subplot(111, projection='3d')
-            ax.scatter(processed_points[:, 0], 
-                      processed_points[:, 1], 
-                      processed_points[:, 2], 
-                      c='b', marker='.')
-            ax.set_xlabel('X')
-            ax.set_ylabel('Y')
-            ax.set_zlabel('Z')
-            plt.title("Preprocessed 3D Data")
-            
-            # Save visualization
-            buffer = io.BytesIO()
-            plt.savefig(buffer, format='png')
-            buffer.seek(0)
-            vis_base64 = base64.b64encode(buffer.getvalue()).decode()
-            plt.close()
-            
-            return jsonify({
-                'visualization': f'data:image/png;base64,{vis_base64}'
-            })
-            
-        else:  # augment
-            augmented_points = augment_3d(points)
-            
-            # Generate visualization
-            fig = plt.figure(figsize=(10, 6))
-            ax = fig.add_subplot(111, projection='3d')
-            ax.scatter(augmented_points[:, 0], 
-                      augmented_points[:, 1], 
-                      augmented_points[:, 2], 
-                      c='r', marker='.')
-            ax.set_xlabel('X')
-            ax.set_ylabel('Y')
-            ax.set_zlabel('Z')
-            plt.title("Augmented 3D Data")
-            
-            # Save visualization
-            buffer = io.BytesIO()
-            plt.savefig(buffer, format='png')
-            buffer.seek(0)
-            vis_base64 = base64.b64encode(buffer.getvalue()).decode()
-            plt.close()
-            
-            return jsonify({
-                'visualization': f'data:image/png;base64,{vis_base64}'
-            })
-            
-    except Exception as e:
-        print(f"Error processing 3D data: {str(e)}")
-        return jsonify({'error': str(e)}), 400
+    # Generate unique filename
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    filename = f"{timestamp}_{file.filename}"
+    
+    # Create full path and ensure directory exists
+    upload_dir = os.path.join(UPLOAD_FOLDER, subdir)
+    os.makedirs(upload_dir, exist_ok=True)  # Ensure directory exists
+    file_path = os.path.join(upload_dir, filename)
+    
+    print(f"Saving file to: {file_path}")  # Debug log
+    file.save(file_path)
+    janitor.track(file_path)
+    print(f"File saved successfully to: {file_path}")
+    return file_path
 
 def visualize_data(data, data_type, title="Original"):
     """
     Visualize different types of data (image, 3D, audio)
     """
+    # Imported here so the web app does not load them at startup
+    import matplotlib.pyplot as plt
+    from mpl_toolkits.mplot3d import Axes3D
+    import librosa
+    import librosa.display
+    import IPython.display as ipd
+    import numpy as np
+    
     plt.figure(figsize=(10, 6))
     
     if data_type == "image":
@@ -372,16 +510,46 @@ def main():
     audio_data = load_audio()  # Your audio loading function
     process_and_visualize(audio_data, "audio")
 
-# Add cleanup function
-@app.before_request
-def cleanup_old_files():
-    # Delete files older than 1 hour
-    for root, dirs, files in os.walk(UPLOAD_FOLDER):
-        for file in files:
-            file_path = os.path.join(root, file)
-            file_age = datetime.now().timestamp() - os.path.getctime(file_path)
-            if file_age > 3600:  # 1 hour in seconds
-                os.remove(file_path)
+@app.route('/artifacts/<name>')
+def get_artifact(name):
+    """
+    Serve a stored output. send_file streams the file and handles
+    If-None-Match and Range requests; the content hash is the ETag.
+    """
+    path = artifact_store.path(name)
+    if path is None:
+        return jsonify({'error': 'Artifact not found or expired'}), 404
+    digest, ext = os.path.splitext(name)
+    return send_file(os.path.abspath(path), mimetype=MIMETYPES.get(ext, 'application/octet-stream'),
+                     etag=digest, max_age=UPLOAD_TTL)
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Stage timings, payload sizes and error counts in Prometheus text format"""
+    if not metrics.METRICS_ENABLED:
+        return jsonify({'error': 'Metrics are disabled'}), 404
+    return Response(metrics.expose(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/modalities')
+def modalities():
+    """Which modality plugins are loaded and how long their import took"""
+    return jsonify(modality_status())
+
+@app.route('/cache/stats')
+def cache_stats():
+    """Hit/miss counters and sizes of the result cache"""
+    return jsonify(result_cache.stats())
+
+@app.route('/render/stats')
+def renderer_stats():
+    """Matplotlib render counts and timings of this worker"""
+    from utils.renderer import render_stats
+    return jsonify(render_stats())
+
+@app.route('/uploads/stats')
+def upload_stats():
+    """Files and bytes currently tracked by the upload janitor"""
+    return jsonify(janitor.stats())
 
 # Add this route to handle favicon requests
 @app.route('/favicon.ico')
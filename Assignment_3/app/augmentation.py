@@ -1,14 +1,54 @@
 import nlpaug.augmenter.word as naw
+from nlpaug.util import Randomness
+import os
+import threading
+
+# Print every original/augmented pair to stdout
+DEBUG_AUGMENT = os.environ.get('DEBUG_AUGMENT', 'false').lower() == 'true'
+
+_augmenter = None
+# nlpaug draws from the global random/numpy generators, so calls are
+# serialized to keep seeded results reproducible
+_lock = threading.Lock()
+
+def get_augmenter() -> naw.SynonymAug:
+    """The synonym augmenter, created once per process and reused"""
+    global _augmenter
+    with _lock:
+        if _augmenter is None:
+            _augmenter = naw.SynonymAug(aug_src='wordnet')
+        return _augmenter
+
+def augment_batch(texts, n: int = 1, seed: int = None):
+    """
+    n synonym-augmented variants of a document, or of every document in a
+    list, in one augmenter call. Returns a list of n strings for a single
+    document and a list of such lists for a list of documents. Variants
+    are drawn independently, so two of them can be equal. Pass a seed to
+    get reproducible variants.
+    """
+    single = isinstance(texts, str)
+    documents = [texts] if single else list(texts)
+    aug = get_augmenter()
+
+    # nlpaug returns one result per list item, without the retry-until-
+    # unique loop it runs for n > 1 on a single string
+    repeated = [document for document in documents for _ in range(n)]
+    with _lock:
+        if seed is not None:
+            Randomness.seed(seed)
+        augmented = aug.augment(repeated) if repeated else []
+
+    variants = [augmented[i * n:(i + 1) * n] for i in range(len(documents))]
 
-def augment_text(text: str) -> str:
-    # Initialize augmenter
-    aug = naw.SynonymAug(aug_src='wordnet')
-    
-    # Augment text
-    augmented_text = aug.augment(text)[0]
-    
     # Print for debugging
-    print("Original:", text)
-    print("Augmented:", augmented_text)
-    
-    return augmented_text 
\ No newline at end of file
+    if DEBUG_AUGMENT:
+        for document, document_variants in zip(documents, variants):
+            print("Original:", document)
+            for variant in document_variants:
+                print("Augmented:", variant)
+
+    return variants[0] if single else variants
+
+def augment_text(text: str, seed: int = None) -> str:
+    return augment_batch(text, 1, seed=seed)[0]
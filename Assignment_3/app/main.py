@@ -1,52 +1,190 @@
-from fastapi import FastAPI, UploadFile, File, Request
+from fastapi import FastAPI, UploadFile, File, Request, Query
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse
+import asyncio
+import codecs
+import functools
 import os
-from .preprocessing import preprocess_text
-from .augmentation import augment_text
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from .preprocessing import preprocess_text, get_pool, shutdown_pool
+from .augmentation import augment_batch
+from .session_store import SessionStore, StoreFull, SESSION_COOKIE, SESSION_HEADER, SESSION_TTL
 
-app = FastAPI()
+# Text state per client session, see session_store.py
+sessions = SessionStore()
+
+# Requests doing CPU-bound work (tokenizing, augmenting) at the same time.
+# The work itself runs on preprocessing's pool (TOKENIZE_WORKERS processes)
+CPU_WORKERS = int(os.environ.get("CPU_WORKERS", os.cpu_count() or 1))
+# Requests allowed to wait for their turn; more get a 503
+CPU_MAX_PENDING = int(os.environ.get("CPU_MAX_PENDING", 16))
+# Largest accepted upload, and the size it is read in
+UPLOAD_MAX_BYTES = int(os.environ.get("UPLOAD_MAX_BYTES", 100 * 1024 * 1024))
+UPLOAD_CHUNK_BYTES = int(os.environ.get("UPLOAD_CHUNK_BYTES", 1024 * 1024))
+# Most variants one /augment request may ask for
+AUGMENT_MAX_VARIANTS = int(os.environ.get("AUGMENT_MAX_VARIANTS", 32))
+
+# A request's steps run on a thread, which hands the CPU-bound part to the
+# process pool. The event loop and the pool's workers never share a GIL, so
+# a long /preprocess does not slow down other requests.
+cpu_executor = ThreadPoolExecutor(max_workers=CPU_WORKERS, thread_name_prefix="cpu")
+cpu_pending = 0  # only touched from the event loop
+
+class ServerBusy(Exception):
+    """Raised by run_cpu when CPU_MAX_PENDING requests are already waiting"""
+
+class UploadTooLarge(Exception):
+    """Raised while reading an upload that goes over UPLOAD_MAX_BYTES"""
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    cpu_executor.shutdown(cancel_futures=True)
+    sessions.close()
+    shutdown_pool()
+
+app = FastAPI(lifespan=lifespan)
 templates = Jinja2Templates(directory="app/templates")
 
-# Store the current state of the text
-class TextState:
-    original_text = ""
-    preprocessed_text = ""
-    augmented_text = ""
+async def run_cpu(func, *args, **kwargs):
+    """Run func on the CPU executor and wait for it without blocking the loop"""
+    global cpu_pending
+    if cpu_pending >= CPU_WORKERS + CPU_MAX_PENDING:
+        raise ServerBusy(f"{cpu_pending} requests already running or waiting")
+    cpu_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(cpu_executor, functools.partial(func, *args, **kwargs))
+    finally:
+        cpu_pending -= 1
+
+@app.exception_handler(ServerBusy)
+async def server_busy(request: Request, exc: ServerBusy):
+    return JSONResponse({"error": f"Server busy: {exc}"}, status_code=503,
+                        headers={"Retry-After": "1"})
+
+@app.exception_handler(UploadTooLarge)
+async def upload_too_large(request: Request, exc: UploadTooLarge):
+    return JSONResponse({"error": f"Upload larger than {UPLOAD_MAX_BYTES} bytes"},
+                        status_code=413)
 
-text_state = TextState()
+@app.middleware("http")
+async def attach_session(request: Request, call_next):
+    # Refuse oversized uploads before the multipart body is parsed
+    content_length = request.headers.get("content-length", "")
+    if (request.url.path == "/upload" and content_length.isdigit()
+            and int(content_length) > UPLOAD_MAX_BYTES):
+        return await upload_too_large(request, UploadTooLarge())
+    session_id = request.headers.get(SESSION_HEADER) or request.cookies.get(SESSION_COOKIE)
+    session, created = sessions.open(session_id)
+    request.state.session = session
+    response = await call_next(request)
+    # Refreshed on every response so the cookie lives as long as the session
+    response.set_cookie(SESSION_COOKIE, session.id, max_age=SESSION_TTL, httponly=True,
+                        samesite="lax")
+    if created:
+        response.headers[SESSION_HEADER] = session.id
+    return response
 
 @app.get("/", response_class=HTMLResponse)
 async def read_root(request: Request):
+    session = request.state.session
     return templates.TemplateResponse(
+        request,
         "index.html",
         {
-            "request": request,
-            "original_text": text_state.original_text,
-            "preprocessed_text": text_state.preprocessed_text,
-            "augmented_text": text_state.augmented_text,
+            "original_text": session.preview("original_text"),
+            "preprocessed_text": session.preview("preprocessed_text"),
+            "augmented_text": session.preview("augmented_text"),
         }
     )
 
+async def read_upload(file: UploadFile) -> str:
+    """Decode an upload chunk by chunk, raising UploadTooLarge past the cap"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pieces = []
+    size = 0
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_BYTES)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > UPLOAD_MAX_BYTES:
+            raise UploadTooLarge()
+        pieces.append(decoder.decode(chunk))
+    pieces.append(decoder.decode(b"", final=True))
+    return "".join(pieces)
+
+def store_upload(session, text):
+    session.clear()
+    session.set("original_text", text)
+    return session.preview("original_text")
+
+def preprocess_session(session):
+    original_text = session.get("original_text")
+    if not original_text:
+        return None
+    # Always on the pool; large documents are split across its workers
+    session.set("preprocessed_text",
+                preprocess_text(original_text, parallel=True))
+    return session.preview("preprocessed_text")
+
+def augment_session(session, n, seed):
+    text_to_augment = session.get("preprocessed_text") or session.get("original_text")
+    if not text_to_augment:
+        return None
+    start = time.perf_counter()
+    # Each worker process builds its augmenter once and keeps it
+    variants = get_pool().submit(augment_batch, text_to_augment, n, seed=seed).result()
+    elapsed = time.perf_counter() - start
+    # The session keeps the first variant
+    session.set("augmented_text", variants[0])
+    return variants, elapsed
+
 @app.post("/upload")
-async def upload_file(file: UploadFile = File(...)):
-    content = await file.read()
-    text_state.original_text = content.decode()
-    text_state.preprocessed_text = ""
-    text_state.augmented_text = ""
-    return {"text": text_state.original_text[:500] + "..." if len(text_state.original_text) > 500 else text_state.original_text}
+async def upload_file(request: Request, file: UploadFile = File(...)):
+    session = request.state.session
+    try:
+        text = await read_upload(file)
+    except UnicodeDecodeError:
+        return {"error": "Uploaded file is not valid UTF-8 text"}
+    try:
+        preview = await run_cpu(store_upload, session, text)
+    except StoreFull as e:
+        return {"error": str(e)}
+    return {"text": preview}
 
 @app.post("/preprocess")
-async def preprocess():
-    if not text_state.original_text:
+async def preprocess(request: Request):
+    session = request.state.session
+    try:
+        preview = await run_cpu(preprocess_session, session)
+    except StoreFull as e:
+        return {"error": str(e)}
+    if preview is None:
         return {"error": "Please upload a file first"}
-    text_state.preprocessed_text = preprocess_text(text_state.original_text)
-    return {"text": text_state.preprocessed_text[:500] + "..." if len(text_state.preprocessed_text) > 500 else text_state.preprocessed_text}
+    return {"text": preview}
 
 @app.post("/augment")
-async def augment():
-    text_to_augment = text_state.preprocessed_text if text_state.preprocessed_text else text_state.original_text
-    if not text_to_augment:
+async def augment(request: Request, n: int = Query(1, ge=1, le=AUGMENT_MAX_VARIANTS),
+                  seed: int = None):
+    session = request.state.session
+    try:
+        result = await run_cpu(augment_session, session, n, seed)
+    except StoreFull as e:
+        return {"error": str(e)}
+    if result is None:
         return {"error": "Please upload a file first"}
-    text_state.augmented_text = augment_text(text_to_augment)
-    return {"text": text_state.augmented_text[:500] + "..." if len(text_state.augmented_text) > 500 else text_state.augmented_text} 
\ No newline at end of file
+    variants, elapsed = result
+    response = {"text": session.preview("augmented_text")}
+    if n > 1:
+        response["variants"] = [variant[:500] + "..." if len(variant) > 500 else variant
+                                for variant in variants]
+    response["variants_per_second"] = n / elapsed if elapsed else None
+    return response
+
+@app.get("/sessions/stats")
+async def session_stats():
+    return {**sessions.stats(), "cpu_workers": CPU_WORKERS, "cpu_pending": cpu_pending}
@@ -1,7 +1,11 @@
 import nltk
 from nltk.tokenize import word_tokenize
 from nltk.corpus import stopwords
+import multiprocessing
+import os
+import re
 import string
+from concurrent.futures import ProcessPoolExecutor
 
 # Download required NLTK data
 try:
@@ -14,22 +18,94 @@ try:
 except LookupError:
     nltk.download('stopwords')
 
-def preprocess_text(text: str) -> str:
+# Documents of at least this many characters are tokenized in parallel
+TOKENIZE_PARALLEL_MIN_CHARS = int(os.environ.get('TOKENIZE_PARALLEL_MIN_CHARS', 1024 * 1024))
+# Target size of each chunk handed to a worker
+TOKENIZE_CHUNK_CHARS = int(os.environ.get('TOKENIZE_CHUNK_CHARS', 256 * 1024))
+# Worker processes for parallel tokenization; 0 means one per CPU
+TOKENIZE_WORKERS = int(os.environ.get('TOKENIZE_WORKERS', 0)) or os.cpu_count() or 1
+# Print every token list to stdout
+DEBUG_TOKENS = os.environ.get('DEBUG_TOKENS', 'false').lower() == 'true'
+
+PUNCTUATION_TABLE = str.maketrans("", "", string.punctuation)
+WHITESPACE = re.compile(r'\s')
+
+_stop_words = None
+_pool = None
+
+def get_stop_words() -> frozenset:
+    """The English stopword set, loaded once per process"""
+    global _stop_words
+    if _stop_words is None:
+        _stop_words = frozenset(stopwords.words('english'))
+    return _stop_words
+
+def get_pool() -> ProcessPoolExecutor:
+    # Created on first use so importing the app does not fork workers. That
+    # first use is on a request thread, so workers come from a forkserver
+    # rather than a fork of the threaded server (as in utils/batch.py)
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=TOKENIZE_WORKERS,
+                                    mp_context=multiprocessing.get_context('forkserver'))
+    return _pool
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+def split_chunks(text: str, chunk_chars: int = TOKENIZE_CHUNK_CHARS):
+    """
+    Yield consecutive pieces of text of about chunk_chars characters, each
+    ending just before a whitespace character so no word is cut in two.
+    """
+    start = 0
+    while start < len(text):
+        match = WHITESPACE.search(text, start + chunk_chars)
+        end = match.start() if match else len(text)
+        yield text[start:end]
+        start = end
+
+def tokenize_chunk(text: str) -> str:
+    """Lowercase, strip punctuation, tokenize and drop stopwords"""
     # Convert to lowercase
     text = text.lower()
-    
+
     # Remove punctuation
-    text = text.translate(str.maketrans("", "", string.punctuation))
-    
+    text = text.translate(PUNCTUATION_TABLE)
+
     # Tokenize
     tokens = word_tokenize(text)
-    
+
     # Remove stopwords
-    stop_words = set(stopwords.words('english'))
-    tokens = [token for token in tokens if token not in stop_words]
-    
+    stop_words = get_stop_words()
+    return " ".join(token for token in tokens if token not in stop_words)
+
+def preprocess_text(text: str, parallel: bool = None, verbose: bool = DEBUG_TOKENS) -> str:
+    """
+    Lowercase, remove punctuation and stopwords, and return the tokens
+    joined by spaces.
+
+    Large documents (TOKENIZE_PARALLEL_MIN_CHARS and up, when there is more
+    than one worker) are split at whitespace into chunks that a process pool
+    tokenizes in parallel, and the results are joined back in order. With
+    punctuation already stripped, word_tokenize does not look across
+    whitespace, so this gives the same tokens as a single pass. Pass
+    parallel=True or False to force either path.
+    """
+    if parallel is None:
+        parallel = TOKENIZE_WORKERS > 1 and len(text) >= TOKENIZE_PARALLEL_MIN_CHARS
+
+    if parallel:
+        pieces = get_pool().map(tokenize_chunk, split_chunks(text))
+        result = " ".join(piece for piece in pieces if piece)
+    else:
+        result = tokenize_chunk(text)
+
     # For debugging - print the tokens
-    print("Tokens:", tokens)
-    
-    # Join tokens back into text with visible token separation
-    return " ".join(tokens)
\ No newline at end of file
+    if verbose:
+        print("Tokens:", result.split())
+
+    return result
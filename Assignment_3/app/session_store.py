@@ -0,0 +1,245 @@
+"""
+Per-session text state for the FastAPI app.
+
+Each client gets a session id in a cookie (API clients may send it in the
+X-Session-Id header instead), and its uploaded, preprocessed and augmented
+texts live in its own Session. The store keeps a byte count per text and
+in total:
+
+- texts larger than SESSION_SPILL_BYTES are written to SESSION_SPILL_DIR
+  and only read back when needed,
+- when the in-memory or on-disk total goes over its cap, the least
+  recently used sessions are dropped,
+- sessions idle for SESSION_TTL seconds expire.
+"""
+import os
+import secrets
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+SESSION_COOKIE = os.environ.get('SESSION_COOKIE', 'session_id')
+SESSION_HEADER = 'X-Session-Id'
+# Idle seconds before a session expires
+SESSION_TTL = int(os.environ.get('SESSION_TTL', 1800))
+# Cap on text held in memory across all sessions
+SESSION_MAX_BYTES = int(os.environ.get('SESSION_MAX_BYTES', 256 * 1024 * 1024))
+# Cap on spilled text on disk across all sessions
+SESSION_MAX_DISK_BYTES = int(os.environ.get('SESSION_MAX_DISK_BYTES', 2 * 1024 * 1024 * 1024))
+# Texts bigger than this are kept on disk; 0 keeps everything in memory
+SESSION_SPILL_BYTES = int(os.environ.get('SESSION_SPILL_BYTES', 4 * 1024 * 1024))
+SESSION_SPILL_DIR = os.environ.get('SESSION_SPILL_DIR',
+                                   os.path.join(tempfile.gettempdir(), 'text_sessions'))
+
+FIELDS = ('original_text', 'preprocessed_text', 'augmented_text')
+
+class StoreFull(Exception):
+    """Raised when a text does not fit even after evicting every other session"""
+
+class Entry:
+    """One stored text: in memory, or in a spill file"""
+    __slots__ = ('text', 'path', 'memory_bytes', 'disk_bytes')
+
+    def __init__(self, text=None, path=None, memory_bytes=0, disk_bytes=0):
+        self.text = text
+        self.path = path
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+
+class Session:
+    def __init__(self, session_id, store):
+        self.id = session_id
+        self.store = store
+        self.entries = {}
+        self.last_used = time.monotonic()
+
+    def get(self, field):
+        """The stored text, '' if there is none"""
+        return self.store.get_text(self, field)
+
+    def set(self, field, text):
+        self.store.set_text(self, field, text)
+
+    def preview(self, field, limit=500):
+        """The first limit characters, with '...' if the text is longer"""
+        return self.store.get_text(self, field, limit)
+
+    def clear(self, *fields):
+        for field in fields or FIELDS:
+            self.store.set_text(self, field, '')
+
+    def to_dict(self):
+        return {
+            'memory_bytes': sum(entry.memory_bytes for entry in self.entries.values()),
+            'disk_bytes': sum(entry.disk_bytes for entry in self.entries.values()),
+            'fields': sorted(self.entries),
+        }
+
+class SessionStore:
+    def __init__(self, max_bytes=SESSION_MAX_BYTES, max_disk_bytes=SESSION_MAX_DISK_BYTES,
+                 ttl=SESSION_TTL, spill_bytes=SESSION_SPILL_BYTES, spill_dir=SESSION_SPILL_DIR):
+        self.max_bytes = max_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl = ttl
+        self.spill_bytes = spill_bytes
+        self.spill_dir = spill_dir
+        self._sessions = OrderedDict()  # id -> Session, least recently used first
+        self._lock = threading.RLock()
+        self.memory_bytes = 0
+        self.disk_bytes = 0
+        self.counters = {'created': 0, 'expired': 0, 'evicted': 0, 'spilled': 0}
+
+    def open(self, session_id=None):
+        """
+        The session for session_id, or a new one if the id is missing,
+        unknown or expired. Returns (session, created).
+        """
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(session_id) if session_id else None
+            if session is not None:
+                self._touch(session)
+                return session, False
+            session = Session(secrets.token_urlsafe(32), self)
+            self._sessions[session.id] = session
+            self.counters['created'] += 1
+            return session, True
+
+    def get_text(self, session, field, limit=None):
+        with self._lock:
+            self._touch(session)
+            entry = session.entries.get(field)
+            if entry is None:
+                return ''
+            if entry.path is None:
+                text = entry.text
+            else:
+                # Opened under the lock so the file cannot be removed first;
+                # read outside it so big reads do not block other sessions
+                f = open(entry.path, encoding='utf-8')
+        if entry.path is not None:
+            with f:
+                text = f.read() if limit is None else f.read(limit + 1)
+        if limit is not None and len(text) > limit:
+            return text[:limit] + '...'
+        return text
+
+    def set_text(self, session, field, text):
+        """
+        Store text under field, replacing what was there; '' removes it.
+        Raises StoreFull if it does not fit.
+        """
+        if field not in FIELDS:
+            raise KeyError(field)
+        entry = None
+        if text:
+            size = sys.getsizeof(text)
+            if self.spill_bytes and size > self.spill_bytes:
+                entry = self._spill(text)
+            else:
+                entry = Entry(text=text, memory_bytes=size)
+
+        if entry is not None and (entry.memory_bytes > self.max_bytes or
+                                  entry.disk_bytes > self.max_disk_bytes):
+            # Would not fit even in an empty store; fail before evicting anyone
+            self._release_file(entry)
+            raise StoreFull(f'Text of {entry.memory_bytes + entry.disk_bytes} bytes '
+                            f'does not fit in the session store')
+
+        with self._lock:
+            # The session may have expired or been evicted meanwhile
+            self._sessions.setdefault(session.id, session)
+            self._touch(session)
+            self._release(session.entries.pop(field, None))
+            if entry is None:
+                return
+            session.entries[field] = entry
+            self.memory_bytes += entry.memory_bytes
+            self.disk_bytes += entry.disk_bytes
+            self._evict(keep=session)
+            if self.memory_bytes > self.max_bytes or self.disk_bytes > self.max_disk_bytes:
+                self._release(session.entries.pop(field))
+                raise StoreFull(f'Text of {entry.memory_bytes + entry.disk_bytes} bytes '
+                                f'does not fit in the session store')
+
+    def delete(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._drop(session)
+
+    def _spill(self, text):
+        os.makedirs(self.spill_dir, exist_ok=True)
+        path = os.path.join(self.spill_dir, uuid.uuid4().hex + '.txt')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        with self._lock:
+            self.counters['spilled'] += 1
+        return Entry(path=path, disk_bytes=os.path.getsize(path))
+
+    def _touch(self, session):
+        session.last_used = time.monotonic()
+        if session.id in self._sessions:
+            self._sessions.move_to_end(session.id)
+
+    def _release(self, entry):
+        """Give back an entry's bytes and remove its spill file. Lock held"""
+        if entry is None:
+            return
+        self.memory_bytes -= entry.memory_bytes
+        self.disk_bytes -= entry.disk_bytes
+        self._release_file(entry)
+
+    def _release_file(self, entry):
+        if entry.path is not None:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+    def _drop(self, session):
+        for entry in session.entries.values():
+            self._release(entry)
+        session.entries = {}
+        del self._sessions[session.id]
+
+    def _evict(self, keep):
+        """Drop least recently used sessions until under both caps. Lock held"""
+        for session in list(self._sessions.values()):
+            if self.memory_bytes <= self.max_bytes and self.disk_bytes <= self.max_disk_bytes:
+                break
+            if session is not keep:
+                self._drop(session)
+                self.counters['evicted'] += 1
+
+    def _expire(self):
+        """Drop sessions idle for longer than ttl. Lock held"""
+        cutoff = time.monotonic() - self.ttl
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if session.last_used >= cutoff:
+                break
+            self._drop(session)
+            self.counters['expired'] += 1
+
+    def stats(self):
+        with self._lock:
+            self._expire()
+            return {
+                'sessions': len(self._sessions),
+                'memory_bytes': self.memory_bytes,
+                'max_bytes': self.max_bytes,
+                'disk_bytes': self.disk_bytes,
+                'max_disk_bytes': self.max_disk_bytes,
+                'ttl': self.ttl,
+                **self.counters,
+            }
+
+    def close(self):
+        """Drop every session and its spill files"""
+        with self._lock:
+            for session in list(self._sessions.values()):
+                self._drop(session)
@@ -0,0 +1,55 @@
+"""
+Compare K sequential augment_audio calls with one augment_audio_batch call
+that produces K variants from a single STFT. Reports variants per second.
+
+The clip is a synthetic tone sweep with noise at 22050 Hz.
+Run from the Assignment_3 directory:
+    python benchmarks/bench_audio_augment.py --seconds 10 --variants 1 4 16
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.augmentor import augment_audio, augment_audio_batch  # noqa: E402
+
+
+def make_clip(seconds, sr=22050, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sr)) / sr
+    sweep = np.sin(2 * np.pi * (220 + 440 * t / seconds) * t)
+    return (0.5 * sweep + 0.05 * rng.normal(size=len(t))).astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--variants', type=int, nargs='+', default=[1, 4, 16])
+    args = parser.parse_args()
+
+    clip = make_clip(args.seconds)
+    # Warm up librosa's lazy imports and FFT plans
+    augment_audio(clip[:22050], seed=0)
+    augment_audio_batch(clip[:22050], 2, seed=0)
+
+    print(f"{'K':>4} {'sequential s':>13} {'batch s':>8} {'seq var/s':>10} "
+          f"{'batch var/s':>12} {'speedup':>8}")
+    for k in args.variants:
+        start = time.perf_counter()
+        for i in range(k):
+            augment_audio(clip, seed=i)
+        sequential = time.perf_counter() - start
+
+        start = time.perf_counter()
+        augment_audio_batch(clip, k, seed=0)
+        batch = time.perf_counter() - start
+
+        print(f"{k:>4} {sequential:>13.2f} {batch:>8.2f} {k / sequential:>10.1f} "
+              f"{k / batch:>12.1f} {sequential / batch:>7.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Throughput of augment_image_batch against K sequential augment_image calls
+(rotate, Brightness, Contrast), in variants per second.
+
+Images are synthetic gradients with noise. Both sides produce uint8 arrays,
+or encoded images with --encode PNG.
+Run from the Assignment_3 directory:
+    python benchmarks/bench_image_augment.py --sizes 640x480 1920x1080 --variants 16
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.augmentor import augment_image, augment_image_batch  # noqa: E402
+
+
+def make_image(width, height, seed=0):
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 1, width, dtype=np.float32)
+    y = np.linspace(0, 1, height, dtype=np.float32)[:, None]
+    channels = [127 + 100 * np.sin(6 * x + phase) * np.cos(4 * y) +
+                rng.normal(0, 8, (height, width)).astype(np.float32)
+                for phase in (0.0, 2.0, 4.0)]
+    return Image.fromarray(np.clip(np.stack(channels, axis=-1), 0, 255).astype(np.uint8))
+
+
+def sequential(image, k, encode):
+    variants = []
+    for i in range(k):
+        augmented = augment_image(image, seed=i)
+        if encode is None:
+            variants.append(np.asarray(augmented))
+        else:
+            buffer = io.BytesIO()
+            augmented.save(buffer, format=encode)
+            variants.append(buffer.getvalue())
+    return np.stack(variants) if encode is None else variants
+
+
+def best_of(repeat, func):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', nargs='+', default=['640x480', '1920x1080', '4000x3000'])
+    parser.add_argument('--variants', type=int, nargs='+', default=[16])
+    parser.add_argument('--encode', help='PIL format to encode variants to, e.g. PNG')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'size':>10} {'K':>4} {'seq var/s':>10} {'batch var/s':>12} {'speedup':>8}")
+    for size in args.sizes:
+        width, height = map(int, size.split('x'))
+        image = make_image(width, height)
+        for k in args.variants:
+            seq = best_of(args.repeat, lambda: sequential(image, k, args.encode))
+            batch = best_of(args.repeat, lambda: augment_image_batch(image, k, seed=0,
+                                                                     encode=args.encode))
+            print(f"{size:>10} {k:>4} {k / seq:>10.1f} {k / batch:>12.1f} {seq / batch:>7.1f}x")
+
+if __name__ == '__main__':
+    main()
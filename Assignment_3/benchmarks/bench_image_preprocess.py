@@ -0,0 +1,103 @@
+"""
+Latency and peak memory of preprocess_image on large photos, compared with
+the previous implementation (full decode, resize, float64 round trip).
+
+Synthetic JPEGs of the given megapixel sizes are written to a temp
+directory. Every measurement runs in a fresh interpreter and reports the
+growth of its peak RSS (PIL's buffers are not visible to tracemalloc).
+Run from the Assignment_3 directory:
+    python benchmarks/bench_image_preprocess.py --megapixels 12 24 48
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+from PIL import Image
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = '''
+import json, sys, time
+import numpy as np
+from PIL import Image
+from utils.preprocessor import preprocess_image
+
+def legacy_preprocess_image(image):
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    standard_size = (224, 224)
+    image = image.resize(standard_size)
+    img_array = np.array(image)
+    img_array = img_array / 255.0
+    normalized_image = Image.fromarray((img_array * 255).astype(np.uint8))
+    display_info = {'original_size': image.size, 'processed_size': standard_size,
+                    'normalized_range': [img_array.min(), img_array.max()]}
+    return normalized_image, display_info
+
+def high_water_kb():
+    # ru_maxrss would include the parent's peak, it survives exec on Linux
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1])
+
+mode, path, repeat = sys.argv[1], sys.argv[2], int(sys.argv[3])
+func = preprocess_image if mode == 'fast' else legacy_preprocess_image
+baseline_kb = high_water_kb()
+times = []
+for _ in range(repeat):
+    start = time.perf_counter()
+    func(Image.open(path))
+    times.append(time.perf_counter() - start)
+peak_kb = high_water_kb()
+print(json.dumps({'seconds': min(times), 'peak_mb': (peak_kb - baseline_kb) / 1024}))
+'''
+
+
+def make_photo(path, megapixels, seed=0):
+    """Smooth gradients plus noise, saved as a quality-90 JPEG"""
+    width = int(np.sqrt(megapixels * 1e6 * 3 / 2))
+    height = int(width * 2 / 3)
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 1, width, dtype=np.float32)
+    y = np.linspace(0, 1, height, dtype=np.float32)[:, None]
+    image = np.empty((height, width, 3), dtype=np.uint8)
+    for channel, phase in enumerate((0.0, 2.0, 4.0)):
+        plane = 127 + 100 * np.sin(6 * x + phase) * np.cos(4 * y)
+        plane += rng.normal(0, 8, (height, width)).astype(np.float32)
+        image[..., channel] = np.clip(plane, 0, 255)
+    Image.fromarray(image).save(path, quality=90)
+    return width, height
+
+
+def probe(mode, path, repeat):
+    output = subprocess.run([sys.executable, '-c', PROBE, mode, path, str(repeat)],
+                            cwd=APP_DIR, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--megapixels', type=float, nargs='+', default=[12, 24, 48])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'size':>12} {'MP':>5} {'legacy s':>9} {'fast s':>7} {'legacy MB':>10} "
+          f"{'fast MB':>8} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for megapixels in args.megapixels:
+            path = os.path.join(tmp, f'{megapixels}mp.jpg')
+            width, height = make_photo(path, megapixels)
+            legacy = probe('legacy', path, args.repeat)
+            fast = probe('fast', path, args.repeat)
+            print(f"{f'{width}x{height}':>12} {width * height / 1e6:>5.1f} "
+                  f"{legacy['seconds']:>9.3f} {fast['seconds']:>7.3f} "
+                  f"{legacy['peak_mb']:>10.1f} {fast['peak_mb']:>8.1f} "
+                  f"{legacy['seconds'] / fast['seconds']:>7.1f}x")
+
+if __name__ == '__main__':
+    main()
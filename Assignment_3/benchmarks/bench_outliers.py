@@ -0,0 +1,67 @@
+"""
+Compare the per-axis ('std') and KD-tree ('sor') outlier removal modes of
+preprocess_3d on large synthetic clouds: run time, peak traced memory and
+how many of the injected outliers each mode removes.
+
+The cloud is a noisy sphere surface plus uniformly scattered outliers that
+stay inside the sphere's bounding box, so they are not extreme on any axis.
+Run from the Assignment_3 directory:
+    python benchmarks/bench_outliers.py --points 1000000 2000000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.preprocessor import preprocess_3d  # noqa: E402
+
+
+def make_cloud(n_points, outlier_fraction, seed=0):
+    rng = np.random.default_rng(seed)
+    n_outliers = int(n_points * outlier_fraction)
+    surface = rng.normal(size=(n_points - n_outliers, 3))
+    surface /= np.linalg.norm(surface, axis=1, keepdims=True)
+    surface += rng.normal(scale=0.005, size=surface.shape)
+    outliers = rng.uniform(-1, 1, size=(n_outliers, 3))
+    return np.vstack([surface, outliers]).astype(np.float32), n_outliers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--points', type=int, nargs='+', default=[1000000])
+    parser.add_argument('--outliers', type=float, default=0.01,
+                        help='Fraction of injected outliers')
+    parser.add_argument('--k', type=int, default=16)
+    args = parser.parse_args()
+    
+    print(f"{'points':>10} {'mode':<5} {'seconds':>8} {'peak MB':>8} {'removed':>9} "
+          f"{'outliers hit':>13}")
+    for n_points in args.points:
+        cloud, n_outliers = make_cloud(n_points, args.outliers)
+        # preprocess_3d keeps row order, so outliers are identified by value
+        centered = cloud - np.mean(cloud, axis=0)
+        centered = centered / np.max(np.abs(centered))
+        outlier_rows = {row.tobytes() for row in centered[len(cloud) - n_outliers:]}
+        
+        for mode in ('std', 'sor'):
+            start = time.perf_counter()
+            kept = preprocess_3d(cloud, outlier_method=mode, k=args.k)
+            elapsed = time.perf_counter() - start
+            
+            # Second run under tracemalloc for the peak (it slows the run down)
+            tracemalloc.start()
+            preprocess_3d(cloud, outlier_method=mode, k=args.k)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            
+            survived = sum(row.tobytes() in outlier_rows for row in kept[-2 * n_outliers:])
+            print(f"{n_points:>10} {mode:<5} {elapsed:>8.2f} {peak / 1e6:>8.1f} "
+                  f"{len(cloud) - len(kept):>9} {n_outliers - survived:>6}/{n_outliers:<6}")
+
+if __name__ == '__main__':
+    main()
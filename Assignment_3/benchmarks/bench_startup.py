@@ -0,0 +1,70 @@
+"""
+Startup time and resident memory of the Flask app, per modality plugin.
+
+Every row runs in a fresh interpreter: import the app, then load one
+modality (or none / all of them) and report the time taken and the RSS.
+Run from the Assignment_3 directory:
+    python benchmarks/bench_startup.py
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = '''
+import json, resource, sys, time
+start = time.perf_counter()
+import app
+app_seconds = time.perf_counter() - start
+from utils.pipeline import preload
+start = time.perf_counter()
+preload([m for m in sys.argv[1].split(',') if m])
+modality_seconds = time.perf_counter() - start
+rss_kb = None
+try:
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                rss_kb = int(line.split()[1])
+except OSError:
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({'app_seconds': app_seconds, 'modality_seconds': modality_seconds,
+                  'rss_mb': rss_kb / 1024}))
+'''
+
+
+def probe(modality, repeat):
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', PROBE, modality], cwd=APP_DIR,
+                                env=dict(os.environ, PRELOAD_MODALITIES=''),
+                                capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    # Best of N to filter out noise from the page cache and other processes
+    return min(runs, key=lambda r: r['app_seconds'] + r['modality_seconds'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', help='Also write the results to this file')
+    args = parser.parse_args()
+    
+    results = {}
+    print(f"{'modality':<10} {'app s':>8} {'modality s':>11} {'RSS MB':>8}")
+    for modality in ['', 'text', 'image', 'audio', '3d', 'all']:
+        result = probe(modality, args.repeat)
+        results[modality or 'none'] = result
+        print(f"{modality or 'none':<10} {result['app_seconds']:>8.2f} "
+              f"{result['modality_seconds']:>11.2f} {result['rss_mb']:>8.1f}")
+    
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Variants per second of the FastAPI app's synonym augmentation: the
+original augment_text (a new SynonymAug for every variant), augment_text
+with the shared augmenter, and augment_batch producing all K variants of
+each document in one call.
+
+Needs the NLTK WordNet corpus.
+Run from the Assignment_3 directory:
+    python benchmarks/bench_synonym_augment.py --words 100 1000 --variants 16 --documents 4
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# app.py shadows the app/ directory as a package, so import the module directly
+sys.path.insert(0, os.path.join(ROOT, 'app'))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import augmentation  # noqa: E402
+from bench_text_preprocess import make_document  # noqa: E402
+
+
+def legacy_augment_text(text):
+    """augment_text as it was before the shared augmenter"""
+    aug = augmentation.naw.SynonymAug(aug_src='wordnet')
+    return aug.augment(text)[0]
+
+
+def make_documents(count, words):
+    text = make_document(1).decode('utf-8').split()
+    return [' '.join(text[i * words:(i + 1) * words]) for i in range(count)]
+
+
+def best_of(repeat, func):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--words', type=int, nargs='+', default=[100, 1000])
+    parser.add_argument('--variants', type=int, default=16)
+    parser.add_argument('--documents', type=int, default=4)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    # Loads WordNet, so the one-off cost is not timed
+    augmentation.get_augmenter()
+    k = args.variants
+    print(f"{'words':>6} {'implementation':<16} {'variants/s':>11} {'speedup':>8}")
+    for words in args.words:
+        documents = make_documents(args.documents, words)
+        total = k * len(documents)
+        runs = [
+            ('legacy', lambda: [legacy_augment_text(d) for d in documents for _ in range(k)]),
+            ('shared', lambda: [augmentation.augment_text(d) for d in documents for _ in range(k)]),
+            ('augment_batch', lambda: augmentation.augment_batch(documents, k, seed=0)),
+        ]
+        baseline = None
+        for name, run in runs:
+            elapsed = best_of(args.repeat, run)
+            baseline = baseline or elapsed
+            print(f"{words:>6} {name:<16} {total / elapsed:>11.1f} {baseline / elapsed:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Throughput (MB/s) and peak traced memory of text preprocessing: the
+original per-character implementation, the regex-based preprocess_text,
+and the chunked iter_preprocess_text streaming path.
+
+Run from the Assignment_3 directory:
+    python benchmarks/bench_text_preprocess.py --size-mb 50
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.preprocessor import preprocess_text, iter_preprocess_text  # noqa: E402
+
+
+def legacy_preprocess_text(text):
+    """preprocess_text as it was before the regex pipeline"""
+    text = text.lower()
+    text = ''.join(c for c in text if c.isalnum() or c.isspace())
+    text = ' '.join(text.split())
+    return text
+
+
+def make_document(size_mb, seed=0):
+    rng = random.Random(seed)
+    words = ['The', 'quick', 'brown', 'fox,', 'jumps', 'over', 'the', 'LAZY', 'dog!',
+             'user_id', '42', '(see:', 'ref.)', '--', 'Hello', 'World.', 'data-set',
+             'pre-processing', 'e.g.', 'NLP', 'tokens;', '"quoted"', 'it\'s', 'and',
+             'of', 'a', 'in', 'to', 'is', 'naïve', 'café']
+    separators = [' ', ' ', ' ', '  ', '\n', '\t']
+    parts = []
+    size = 0
+    target = size_mb * 1024 * 1024
+    while size < target:
+        piece = rng.choice(words) + rng.choice(separators)
+        parts.append(piece)
+        size += len(piece)
+    return ''.join(parts).encode('utf-8')
+
+
+def measure(fn):
+    """Time one run, then repeat it under tracemalloc for the peak"""
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    del result
+    tracemalloc.start()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size-mb', type=float, default=20)
+    parser.add_argument('--chunk-kb', type=int, default=1024)
+    parser.add_argument('--skip-legacy', action='store_true',
+                        help='Skip the slow per-character baseline')
+    args = parser.parse_args()
+    
+    document = make_document(args.size_mb)
+    size_mb = len(document) / (1024 * 1024)
+    chunk_size = args.chunk_kb * 1024
+    
+    def streamed():
+        stream = io.BytesIO(document)
+        chunks = iter(lambda: stream.read(chunk_size), b'')
+        written = 0
+        for piece in iter_preprocess_text(chunks):
+            written += len(piece)
+        return written
+    
+    runs = [
+        ('preprocess_text', lambda: preprocess_text(document.decode('utf-8'))),
+        ('iter_preprocess_text', streamed),
+    ]
+    if not args.skip_legacy:
+        runs.insert(0, ('legacy', lambda: legacy_preprocess_text(document.decode('utf-8'))))
+    
+    print(f"Document: {size_mb:.1f} MB, chunk size {args.chunk_kb} KB")
+    print(f"{'implementation':<22} {'seconds':>9} {'MB/s':>9} {'peak MB':>9}")
+    reference = None
+    for name, fn in runs:
+        result, elapsed, peak = measure(fn)
+        if isinstance(result, str):
+            reference = reference or result
+            assert result == reference, f"{name} output differs"
+        print(f"{name:<22} {elapsed:>9.2f} {size_mb / elapsed:>9.1f} {peak / 1e6:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Tokens per second of the FastAPI app's preprocess_text: the original
+version (stopword set rebuilt on every call, one thread), the single-pass
+path and the chunked process-pool path at several worker counts.
+
+The pool is started and warmed before timing, as it is in a running
+server. Outputs of all paths are checked to be identical.
+Run from the Assignment_3 directory:
+    python benchmarks/bench_tokenize.py --size-mb 1 10 --workers 2 4
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# app.py shadows the app/ directory as a package, so import the module directly
+sys.path.insert(0, os.path.join(ROOT, 'app'))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import preprocessing  # noqa: E402
+from bench_text_preprocess import make_document  # noqa: E402
+
+
+def legacy_preprocess_text(text):
+    """preprocess_text as it was before the shared stopword set and pool"""
+    import string
+    from nltk.corpus import stopwords
+    from nltk.tokenize import word_tokenize
+    text = text.lower()
+    text = text.translate(str.maketrans("", "", string.punctuation))
+    tokens = word_tokenize(text)
+    stop_words = set(stopwords.words('english'))
+    tokens = [token for token in tokens if token not in stop_words]
+    return " ".join(tokens)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size-mb', type=float, nargs='+', default=[1, 10])
+    parser.add_argument('--workers', type=int, nargs='+', default=[2, 4])
+    parser.add_argument('--chunk-kb', type=int, default=preprocessing.TOKENIZE_CHUNK_CHARS // 1024)
+    parser.add_argument('--skip-legacy', action='store_true')
+    args = parser.parse_args()
+    preprocessing.TOKENIZE_CHUNK_CHARS = args.chunk_kb * 1024
+
+    print(f"{'size MB':>8} {'implementation':<18} {'seconds':>9} {'tokens/s':>12} {'speedup':>8}")
+    for size_mb in args.size_mb:
+        text = make_document(size_mb).decode('utf-8')
+        runs = [('single pass', lambda: preprocessing.preprocess_text(text, parallel=False))]
+        if not args.skip_legacy:
+            runs.insert(0, ('legacy', lambda: legacy_preprocess_text(text)))
+        for workers in args.workers:
+            runs.append((f'pool x{workers}', workers))
+
+        reference = baseline = None
+        for name, run in runs:
+            if isinstance(run, int):
+                preprocessing.shutdown_pool()
+                preprocessing.TOKENIZE_WORKERS = run
+                list(preprocessing.get_pool().map(preprocessing.tokenize_chunk, ['warm up'] * run))
+                run = lambda: preprocessing.preprocess_text(text, parallel=True)  # noqa: E731
+            result, elapsed = timed(run)
+            reference = reference or result
+            assert result == reference, f"{name} output differs"
+            baseline = baseline or elapsed
+            tokens = result.count(' ') + 1 if result else 0
+            print(f"{size_mb:>8g} {name:<18} {elapsed:>9.2f} {tokens / elapsed:>12,.0f} "
+                  f"{baseline / elapsed:>7.2f}x")
+    preprocessing.shutdown_pool()
+
+
+if __name__ == '__main__':
+    main()
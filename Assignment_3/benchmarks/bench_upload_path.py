@@ -0,0 +1,145 @@
+"""
+Compare /process request latency and disk bytes written for the
+in-memory upload path and the save-to-disk path.
+
+The app runs in a child process so that its /proc/<pid>/io counters
+only include the server's own writes. Run from the Assignment_3 directory:
+    python benchmarks/bench_upload_path.py --requests 20
+"""
+import argparse
+import io
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+import numpy as np
+import soundfile as sf
+from PIL import Image
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_samples():
+    """Build one synthetic upload per input type"""
+    rng = np.random.default_rng(0)
+    
+    image_buffer = io.BytesIO()
+    Image.fromarray(rng.integers(0, 256, (1080, 1920, 3), dtype=np.uint8)).save(image_buffer, format='PNG')
+    
+    audio_buffer = io.BytesIO()
+    sf.write(audio_buffer, rng.uniform(-1, 1, 22050 * 10).astype(np.float32), 22050, format='WAV')
+    
+    points = rng.normal(size=(50000, 3)).astype(np.float32)
+    ply_buffer = io.BytesIO()
+    ply_buffer.write(b'ply\nformat binary_little_endian 1.0\n'
+                     b'element vertex %d\nproperty float x\nproperty float y\n'
+                     b'property float z\nend_header\n' % len(points))
+    ply_buffer.write(points.tobytes())
+    
+    text = ('The quick brown fox, jumps over the LAZY dog! ' * 20000).encode()
+    
+    return {
+        'text': ('sample.txt', text),
+        'image': ('sample.png', image_buffer.getvalue()),
+        'audio': ('sample.wav', audio_buffer.getvalue()),
+        '3d': ('sample.ply', ply_buffer.getvalue()),
+    }
+
+
+def start_server(port):
+    """Start the app in a child process and wait until it answers"""
+    # Every request posts the same body, so the result cache is turned off
+    # to time the upload path rather than cache hits
+    server = subprocess.Popen(
+        [sys.executable, '-c', f"from app import app; app.run(port={port}, threaded=True)"],
+        cwd=APP_DIR, env={**os.environ, 'RESULT_CACHE_BYTES': '0'},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(600):
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/debug-static')
+            return server
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.5)
+    server.kill()
+    raise RuntimeError('App did not start')
+
+
+def disk_bytes_written(pid):
+    """Bytes the server process has caused to be written to storage (Linux)"""
+    with open(f'/proc/{pid}/io') as f:
+        for line in f:
+            if line.startswith('write_bytes:'):
+                return int(line.split()[1])
+    return 0
+
+
+def encode_multipart(fields, filename, payload):
+    boundary = uuid.uuid4().hex
+    body = io.BytesIO()
+    for name, value in fields.items():
+        body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'
+                   f'{value}\r\n'.encode())
+    body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="file"; '
+               f'filename="{filename}"\r\nContent-Type: application/octet-stream\r\n\r\n'.encode())
+    body.write(payload)
+    body.write(f'\r\n--{boundary}--\r\n'.encode())
+    return body.getvalue(), f'multipart/form-data; boundary={boundary}'
+
+
+def run(server, port, input_type, sample, save_upload, n_requests):
+    filename, payload = sample
+    fields = {
+        'input_type': input_type,
+        'action': 'preprocess',
+        'save_upload': 'true' if save_upload else 'false',
+    }
+    body, content_type = encode_multipart(fields, filename, payload)
+    latencies = []
+    written_before = disk_bytes_written(server.pid)
+    for _ in range(n_requests):
+        http_request = urllib.request.Request(f'http://127.0.0.1:{port}/process', data=body,
+                                              headers={'Content-Type': content_type})
+        start = time.perf_counter()
+        with urllib.request.urlopen(http_request) as response:
+            response.read()
+        latencies.append(time.perf_counter() - start)
+    # Give the kernel a moment to account for buffered writes
+    os.sync()
+    written = disk_bytes_written(server.pid) - written_before
+    return {
+        'median_ms': statistics.median(latencies) * 1000,
+        'p95_ms': sorted(latencies)[int(0.95 * (len(latencies) - 1))] * 1000,
+        'disk_bytes': written,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=20)
+    parser.add_argument('--types', nargs='+', default=['text', 'image', 'audio', '3d'])
+    parser.add_argument('--port', type=int, default=5057)
+    args = parser.parse_args()
+    
+    samples = make_samples()
+    server = start_server(args.port)
+    try:
+        print(f"{'type':<6} {'path':<7} {'median ms':>10} {'p95 ms':>10} {'disk MB':>10}")
+        for input_type in args.types:
+            for save_upload in (True, False):
+                result = run(server, args.port, input_type, samples[input_type],
+                             save_upload, args.requests)
+                print(f"{input_type:<6} {'disk' if save_upload else 'memory':<7} "
+                      f"{result['median_ms']:>10.1f} {result['p95_ms']:>10.1f} "
+                      f"{result['disk_bytes'] / 1e6:>10.2f}")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == '__main__':
+    main()
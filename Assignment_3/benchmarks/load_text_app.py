@@ -0,0 +1,152 @@
+"""
+Latency of GET / on the FastAPI text app while another client runs a
+large /preprocess.
+
+Starts the app under uvicorn in a subprocess, then probes GET / from
+--clients threads, first on an idle server and then while a second
+session uploads a --size-mb document and preprocesses it. Reports p50,
+p99 and max latency for both phases, and how long the /preprocess took.
+Run from the Assignment_3 directory:
+    python benchmarks/load_text_app.py --size-mb 20 --clients 4
+"""
+import argparse
+import importlib
+import importlib.machinery
+import importlib.util
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from bench_text_preprocess import make_document  # noqa: E402
+
+
+def register_app_package():
+    """
+    app.py shadows the app/ directory as a package, so the directory is
+    registered under another package name.
+    """
+    spec = importlib.machinery.ModuleSpec('text_app', None, is_package=True)
+    spec.submodule_search_locations = [os.path.join(ROOT, 'app')]
+    sys.modules['text_app'] = importlib.util.module_from_spec(spec)
+
+
+# At import time, because the app's pool workers re-import this script and
+# need the package to unpickle their tasks
+register_app_package()
+
+
+def load_app():
+    """Import app/main.py"""
+    return importlib.import_module('text_app.main').app
+
+
+def serve(port):
+    import uvicorn
+    os.chdir(ROOT)  # templates are looked up relative to the working directory
+    uvicorn.run(load_app(), host='127.0.0.1', port=port, log_level='warning')
+
+
+def wait_ready(base_url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(base_url + '/sessions/stats', timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f'server at {base_url} did not start within {timeout}s')
+
+
+def probe(base_url, stop, latencies, interval):
+    with httpx.Client(base_url=base_url, timeout=120) as client:
+        while not stop.is_set():
+            start = time.perf_counter()
+            client.get('/').raise_for_status()
+            latencies.append(time.perf_counter() - start)
+            time.sleep(interval)
+
+
+def probe_phase(base_url, clients, interval, until):
+    """Probe GET / from several clients until until() returns"""
+    stop = threading.Event()
+    latencies = []
+    threads = [threading.Thread(target=probe, args=(base_url, stop, latencies, interval))
+               for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    until()
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sorted(latencies)
+
+
+def percentile(values, q):
+    if not values:
+        return float('nan')
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--serve':
+        serve(int(sys.argv[2]))
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size-mb', type=float, default=20)
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--interval', type=float, default=0.01,
+                        help='pause between one client\'s requests, in seconds')
+    parser.add_argument('--idle-seconds', type=float, default=3)
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    base_url = f'http://127.0.0.1:{args.port}'
+    server = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--serve',
+                               str(args.port)], cwd=ROOT)
+    try:
+        wait_ready(base_url)
+        document = make_document(args.size_mb)
+        worker = httpx.Client(base_url=base_url, timeout=None)
+        response = worker.post('/upload', files={'file': ('doc.txt', document)})
+        response.raise_for_status()
+        if 'error' in response.json():
+            raise SystemExit(f"upload failed: {response.json()['error']}")
+
+        idle = probe_phase(base_url, args.clients, args.interval,
+                           lambda: time.sleep(args.idle_seconds))
+
+        preprocess = {}
+
+        def run_preprocess():
+            start = time.perf_counter()
+            preprocess['response'] = worker.post('/preprocess')
+            preprocess['seconds'] = time.perf_counter() - start
+
+        busy = probe_phase(base_url, args.clients, args.interval, run_preprocess)
+        worker.close()
+        body = preprocess['response'].json()
+        if preprocess['response'].status_code != 200 or 'error' in body:
+            print(f"warning: /preprocess returned {preprocess['response'].status_code}: "
+                  f"{body.get('error') or body.get('detail')}")
+
+        print(f"Document {args.size_mb:g} MB, /preprocess took {preprocess['seconds']:.2f}s")
+        print(f"{'phase':<24} {'requests':>9} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+        for name, latencies in (('GET / idle', idle), ('GET / during preprocess', busy)):
+            print(f"{name:<24} {len(latencies):>9} {percentile(latencies, 0.5) * 1000:>9.1f} "
+                  f"{percentile(latencies, 0.99) * 1000:>9.1f} "
+                  f"{(latencies[-1] if latencies else float('nan')) * 1000:>9.1f}")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == '__main__':
+    main()
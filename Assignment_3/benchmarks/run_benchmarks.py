@@ -0,0 +1,388 @@
+"""
+Benchmark suite for every preprocess_* and augment_* function in
+utils.preprocessor and utils.augmentor.
+
+Inputs are synthetic and generated per size: text from KB to 100 MB,
+images from 0.1 to 50 MP (as JPEG bytes, decoded inside the timed call),
+audio from 1 s to 1 h at 22050 Hz and point clouds from 1k to 5M points.
+Every function/size pair runs in its own process, so one case cannot warm
+caches for another, and reports the best and median wall time plus the
+peak resident memory the call added on top of its input.
+
+Results are written as JSON. With --compare, they are checked against a
+saved baseline and the exit status is 1 if any case got slower or bigger
+than the threshold allows.
+
+Run from the Assignment_3 directory:
+    python benchmarks/run_benchmarks.py --preset quick --output baseline.json
+    python benchmarks/run_benchmarks.py --preset quick --compare baseline.json
+    python benchmarks/run_benchmarks.py --only augment_audio --sizes audio=10s,60s
+    python benchmarks/run_benchmarks.py --load new.json --compare baseline.json
+"""
+import argparse
+import inspect
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+MODULES = ('utils.preprocessor', 'utils.augmentor')
+MODALITIES = ('text', 'image', 'audio', '3d')
+SAMPLE_RATE = 22050
+# Variants per call for the *_batch functions
+BATCH_K = 4
+
+PRESETS = {
+    'quick': {
+        'text': ['1KB', '1MB'],
+        'image': ['0.1MP', '1MP'],
+        'audio': ['1s', '10s'],
+        '3d': ['1k', '100k'],
+    },
+    'default': {
+        'text': ['1KB', '1MB', '10MB'],
+        'image': ['0.1MP', '2MP', '12MP'],
+        'audio': ['1s', '60s', '600s'],
+        '3d': ['1k', '100k', '1M'],
+    },
+    'full': {
+        'text': ['1KB', '1MB', '10MB', '100MB'],
+        'image': ['0.1MP', '2MP', '12MP', '50MP'],
+        'audio': ['1s', '60s', '600s', '1h'],
+        '3d': ['1k', '100k', '1M', '5M'],
+    },
+}
+
+UNITS = {
+    'text': {'B': 1, 'KB': 1024, 'MB': 1024 ** 2},
+    'image': {'MP': 1e6},
+    'audio': {'s': 1, 'm': 60, 'h': 3600},
+    '3d': {'': 1, 'k': 1e3, 'M': 1e6},
+}
+
+
+def parse_size(modality, label):
+    """'10MB' -> 10485760 bytes, '2MP' -> 2e6 pixels, '1h' -> 3600 s, '5M' -> 5e6 points"""
+    for unit, factor in sorted(UNITS[modality].items(), key=lambda item: -len(item[0])):
+        if label.endswith(unit):
+            number = label[:len(label) - len(unit)] if unit else label
+            try:
+                return float(number) * factor
+            except ValueError:
+                break
+    raise ValueError(f'Bad {modality} size {label!r}, expected units {list(UNITS[modality])}')
+
+
+def discover():
+    """(name, module, modality) for every public preprocess_*/augment_* function"""
+    import importlib
+    found = []
+    for module_name in MODULES:
+        module = importlib.import_module(module_name)
+        for name, func in inspect.getmembers(module, inspect.isfunction):
+            if func.__module__ != module_name or not name.startswith(('preprocess_', 'augment_')):
+                continue
+            modality = name.split('_')[1]
+            if modality in MODALITIES:
+                found.append((name, module_name, modality))
+    return found
+
+
+# Input generators. Each returns an object that make_call() turns into
+# fresh arguments for every timed run.
+
+def make_text(size, seed=0):
+    rng = np.random.default_rng(seed)
+    words = ['The', 'quick', 'brown', 'fox,', 'jumps', 'over', 'the', 'LAZY', 'dog!',
+             'user_id', '42', '(see:', 'ref.)', '--', 'Hello', 'World.', 'data-set',
+             'pre-processing', 'e.g.', 'NLP', 'tokens;', '"quoted"', 'it\'s', 'and',
+             'of', 'a', 'in', 'to', 'is', 'naïve', 'café']
+    separators = [' ', ' ', ' ', '  ', '\n', '\t']
+    # A 64 KB random block repeated; big enough that nothing is cached per word
+    pieces = [words[i] + separators[j] for i, j in zip(rng.integers(len(words), size=12000),
+                                                        rng.integers(len(separators), size=12000))]
+    block = ''.join(pieces)
+    text = block * (int(size) // len(block) + 1)
+    return text[:int(size)]
+
+
+def make_jpeg(pixels, seed=0):
+    from PIL import Image
+    width = max(1, int(round((pixels * 4 / 3) ** 0.5)))
+    height = max(1, int(round(pixels / width)))
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    image = np.empty((height, width, 3), dtype=np.uint8)
+    for channel, (a, b) in enumerate([(0.6, 0.4), (0.3, 0.7), (0.5, 0.5)]):
+        image[..., channel] = (a * x + b * y).astype(np.uint8)
+    image += rng.integers(0, 16, size=image.shape, dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(image).save(buffer, format='JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def make_audio(seconds, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE), dtype=np.float32) / SAMPLE_RATE
+    audio = 0.5 * np.sin(2 * np.pi * 220 * t) + 0.25 * np.sin(2 * np.pi * 1375 * t)
+    audio *= (np.sin(2 * np.pi * 0.5 * t) > -0.5)  # silent gaps for preprocess_audio to drop
+    audio += rng.normal(0, 0.01, len(t)).astype(np.float32)
+    return audio.astype(np.float32)
+
+
+def make_cloud(n_points, seed=0):
+    rng = np.random.default_rng(seed)
+    n_points = int(n_points)
+    points = rng.normal(size=(n_points, 3)).astype(np.float32)
+    points /= np.linalg.norm(points, axis=1, keepdims=True)
+    points += rng.normal(0, 0.01, size=points.shape).astype(np.float32)
+    # 0.1% far-away outliers
+    n_outliers = max(1, n_points // 1000)
+    points[:n_outliers] = rng.uniform(-10, 10, size=(n_outliers, 3))
+    return points
+
+
+GENERATORS = {'text': make_text, 'image': make_jpeg, 'audio': make_audio, '3d': make_cloud}
+
+
+def make_call(func, modality, data):
+    """A zero-argument callable running func once on data"""
+    batch = func.__name__.endswith('_batch')
+    if modality == 'image':
+        from PIL import Image
+
+        def call():
+            # Decoding is part of the timed call, as preprocess_image relies
+            # on drafting the JPEG before its pixels are loaded
+            image = Image.open(io.BytesIO(data))
+            return func(image, BATCH_K, seed=0) if batch else func(image)
+        return call
+    if batch:
+        return lambda: func(data, BATCH_K, seed=0)
+    if 'seed' in inspect.signature(func).parameters:
+        return lambda: func(data, seed=0)
+    return lambda: func(data)
+
+
+def memory_kb():
+    """(VmRSS, VmHWM) of this process in KB"""
+    values = {}
+    with open('/proc/self/status') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if key in ('VmRSS', 'VmHWM'):
+                values[key] = int(value.split()[0])
+    return values['VmRSS'], values['VmHWM']
+
+
+def reset_peak():
+    """Reset VmHWM to the current RSS (Linux 4.0+); False if not possible"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def run_case(name, module_name, modality, label, repeat):
+    """Benchmark one function at one size, in this process"""
+    import gc
+    import importlib
+    func = getattr(importlib.import_module(module_name), name)
+    data = GENERATORS[modality](parse_size(modality, label))
+    call = make_call(func, modality, data)
+    gc.collect()
+
+    # The first run pays one-off costs (lazy imports, index loading) and is
+    # reported separately; memory is measured over the warm runs
+    start = time.perf_counter()
+    call()
+    first = time.perf_counter() - start
+    gc.collect()
+
+    can_reset = reset_peak()
+    rss_before, _ = memory_kb()
+    times = []
+    for _ in range(max(repeat, 1)):
+        start = time.perf_counter()
+        call()
+        times.append(time.perf_counter() - start)
+    _, peak = memory_kb()
+    return {
+        'first_seconds': first,
+        'seconds': min(times),
+        'median_seconds': statistics.median(times),
+        'peak_mb': (peak - rss_before) / 1024 if can_reset else None,
+    }
+
+
+def describe(exc):
+    """Exception type and the first meaningful line of its message"""
+    lines = [line.strip() for line in str(exc).splitlines()
+             if any(c.isalnum() for c in line)]
+    return f'{type(exc).__name__}: {lines[0]}' if lines else type(exc).__name__
+
+
+def run_child(name, module_name, modality, label, repeat, timeout):
+    """run_case in a fresh interpreter, so every case starts cold and alone"""
+    command = [sys.executable, os.path.abspath(__file__), '--child',
+               name, module_name, modality, label, str(repeat)]
+    try:
+        proc = subprocess.run(command, cwd=ROOT, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {'status': 'timeout', 'error': f'no result after {timeout}s'}
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        # Killed, e.g. by the OOM killer, before it could report
+        return {'status': 'error', 'error': f'exit code {proc.returncode}'}
+    result = json.loads(lines[-1])
+    return {'status': 'error' if 'error' in result else 'ok', **result}
+
+
+def case_key(result):
+    return f"{result['function']}[{result['size']}]"
+
+
+def format_seconds(value):
+    return '-' if value is None else f'{value:.4f}'
+
+
+def format_mb(value):
+    return '-' if value is None else f'{value:.1f}'
+
+
+def run_all(args):
+    sizes = {modality: list(labels) for modality, labels in PRESETS[args.preset].items()}
+    for spec in args.sizes or []:
+        modality, _, labels = spec.partition('=')
+        if modality not in MODALITIES:
+            raise SystemExit(f'Unknown modality {modality!r} in --sizes, expected {MODALITIES}')
+        sizes[modality] = labels.split(',')
+    for modality, labels in sizes.items():
+        for label in labels:
+            parse_size(modality, label)
+
+    results = []
+    print(f"{'case':<34} {'best s':>9} {'median s':>9} {'first s':>9} {'peak MB':>8}")
+    for name, module_name, modality in discover():
+        if args.only and not any(pattern in name for pattern in args.only):
+            continue
+        for label in sizes[modality]:
+            result = {'function': name, 'module': module_name, 'modality': modality,
+                      'size': label}
+            result.update(run_child(name, module_name, modality, label, args.repeat,
+                                    args.timeout))
+            results.append(result)
+            if result['status'] == 'ok':
+                print(f"{case_key(result):<34} {format_seconds(result['seconds']):>9} "
+                      f"{format_seconds(result['median_seconds']):>9} "
+                      f"{format_seconds(result['first_seconds']):>9} "
+                      f"{format_mb(result['peak_mb']):>8}")
+            else:
+                print(f"{case_key(result):<34} {result['status']}: {result['error']}")
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'preset': args.preset,
+        'repeat': args.repeat,
+        'results': results,
+    }
+
+
+def compare(report, baseline, threshold, min_seconds, min_mb):
+    """Print a comparison table and return the number of regressions"""
+    previous = {case_key(result): result for result in baseline['results']}
+    regressions = 0
+    print(f"\n{'case':<34} {'base s':>9} {'new s':>9} {'ratio':>7} "
+          f"{'base MB':>8} {'new MB':>8}  verdict")
+    for result in report['results']:
+        key = case_key(result)
+        old = previous.get(key)
+        if old is None or old['status'] != 'ok' or result['status'] != 'ok':
+            status = 'new case' if old is None else f"{old['status']} -> {result['status']}"
+            print(f'{key:<34} {status}')
+            continue
+        notes = []
+        ratio = result['seconds'] / old['seconds'] if old['seconds'] else float('inf')
+        if (result['seconds'] > old['seconds'] * (1 + threshold) and
+                result['seconds'] - old['seconds'] >= min_seconds):
+            notes.append('SLOWER')
+        elif result['seconds'] < old['seconds'] * (1 - threshold):
+            notes.append('faster')
+        if (old['peak_mb'] is not None and result['peak_mb'] is not None and
+                result['peak_mb'] > max(old['peak_mb'], 0) * (1 + threshold) and
+                result['peak_mb'] - old['peak_mb'] >= min_mb):
+            notes.append('MORE MEMORY')
+        if 'SLOWER' in notes or 'MORE MEMORY' in notes:
+            regressions += 1
+        print(f"{key:<34} {format_seconds(old['seconds']):>9} "
+              f"{format_seconds(result['seconds']):>9} {ratio:>6.2f}x "
+              f"{format_mb(old['peak_mb']):>8} {format_mb(result['peak_mb']):>8}  "
+              f"{', '.join(notes) or 'ok'}")
+    print(f'\n{regressions} regression(s) beyond {threshold:.0%}')
+    return regressions
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        name, module_name, modality, label, repeat = sys.argv[2:7]
+        try:
+            result = run_case(name, module_name, modality, label, int(repeat))
+        except Exception as e:
+            result = {'error': describe(e)}
+        print(json.dumps(result))
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='default',
+                        help='size set; "full" goes up to 100 MB / 50 MP / 1 h / 5M points')
+    parser.add_argument('--sizes', nargs='+', metavar='MODALITY=SIZES',
+                        help='override a preset, e.g. text=1MB,100MB image=50MP 3d=5M')
+    parser.add_argument('--only', nargs='+', metavar='NAME',
+                        help='run only functions whose name contains one of these')
+    parser.add_argument('--repeat', type=int, default=3, help='warm timed runs after the first')
+    parser.add_argument('--timeout', type=float, default=900, help='seconds allowed per case')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--load', help='compare an existing results file instead of running')
+    parser.add_argument('--compare', metavar='BASELINE', help='results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='relative slowdown or memory growth counted as a regression')
+    parser.add_argument('--min-seconds', type=float, default=0.005,
+                        help='ignore slowdowns smaller than this, in seconds')
+    parser.add_argument('--min-mb', type=float, default=2.0,
+                        help='ignore memory growth smaller than this, in MB')
+    args = parser.parse_args()
+
+    if args.load:
+        with open(args.load) as f:
+            report = json.load(f)
+    else:
+        report = run_all(args)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'\nWrote {len(report["results"])} results to {args.output}')
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold, args.min_seconds, args.min_mb):
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Binary outputs (PNGs, WAVs) of the modality handlers.
+
+Handlers return Artifact values in their payloads instead of encoding the
+bytes themselves. finalize() turns them into base64 data URIs ('inline'
+mode, the original response format) or stores them in an ArtifactStore and
+puts their URLs in the JSON ('url' mode).
+"""
+import base64
+import hashlib
+import json
+import os
+import re
+import tempfile
+from collections import namedtuple
+
+Artifact = namedtuple('Artifact', ['data', 'mimetype'])
+
+EXTENSIONS = {'image/png': '.png', 'image/jpeg': '.jpg', 'image/svg+xml': '.svg',
+              'audio/wav': '.wav'}
+MIMETYPES = {ext: mimetype for mimetype, ext in EXTENSIONS.items()}
+ARTIFACT_NAME = re.compile(r'^[0-9a-f]{32}\.[a-z0-9]+$')
+
+class ArtifactStore:
+    """
+    Content-addressed files under root, named <sha256 prefix>.<ext>.
+    Storing the same bytes twice reuses the file and restarts its TTL; the
+    janitor (if given) deletes artifacts like any other upload.
+    """
+
+    def __init__(self, root, janitor=None):
+        self.root = root
+        self.janitor = janitor
+        os.makedirs(root, exist_ok=True)
+
+    def put(self, artifact):
+        """Store an Artifact and return its file name"""
+        digest = hashlib.sha256(artifact.data).hexdigest()[:32]
+        name = digest + EXTENSIONS.get(artifact.mimetype, '.bin')
+        path = os.path.join(self.root, name)
+        if not os.path.exists(path):
+            fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(artifact.data)
+            os.replace(tmp_path, path)
+        if self.janitor is not None:
+            self.janitor.track(path)
+        return name
+
+    def path(self, name):
+        """Path of a stored artifact, None if the name is invalid or expired"""
+        if not ARTIFACT_NAME.match(name):
+            return None
+        path = os.path.join(self.root, name)
+        return path if os.path.exists(path) else None
+
+def to_data_uri(artifact):
+    encoded = base64.b64encode(artifact.data).decode()
+    return f'data:{artifact.mimetype};base64,{encoded}'
+
+def finalize(payload, store=None, url_prefix='/artifacts/'):
+    """
+    Replace the Artifact values of a payload with data URIs, or with URLs
+    into store when one is given. In URL mode the payload also gets an
+    'artifacts' entry with the content type and size of each output.
+    """
+    result = {}
+    artifacts = {}
+    for key, value in payload.items():
+        if not isinstance(value, Artifact):
+            result[key] = value
+        elif store is None:
+            result[key] = to_data_uri(value)
+        else:
+            url = url_prefix + store.put(value)
+            result[key] = url
+            artifacts[key] = {'url': url, 'content_type': value.mimetype,
+                              'bytes': len(value.data)}
+    if artifacts:
+        result['artifacts'] = artifacts
+    return result
+
+def pack_payload(payload):
+    """
+    Serialize a payload that may hold Artifacts to bytes without base64:
+    a JSON header line followed by the raw artifact bytes
+    """
+    header = {}
+    blobs = []
+    for key, value in payload.items():
+        if isinstance(value, Artifact):
+            header[key] = {'$artifact': value.mimetype, 'bytes': len(value.data)}
+            blobs.append(value.data)
+        else:
+            header[key] = value
+    return json.dumps(header).encode() + b'\n' + b''.join(blobs)
+
+def unpack_payload(data):
+    """Inverse of pack_payload"""
+    newline = data.index(b'\n')
+    payload = json.loads(data[:newline])
+    offset = newline + 1
+    for key, value in payload.items():
+        if isinstance(value, dict) and '$artifact' in value:
+            end = offset + value['bytes']
+            payload[key] = Artifact(data[offset:end], value['$artifact'])
+            offset = end
+    return payload
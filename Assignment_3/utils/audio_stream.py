@@ -0,0 +1,64 @@
+"""
+Block-streaming version of preprocess_audio for long recordings.
+
+The input is read in fixed-size blocks with soundfile instead of being
+decoded whole by librosa.load. Normalization needs the global peak, so the
+file is read twice: once for the peak, once to gate, smooth and write each
+block. Memory use depends on the block size, not on the recording length.
+"""
+import numpy as np
+import soundfile as sf
+
+# Frames read per block
+BLOCK_SIZE = 65536
+
+class StreamingPreprocessor:
+    """
+    preprocess_audio's normalize -> silence gate -> moving average, applied
+    block by block. The last window_size - 1 gated samples are carried over
+    so the output matches a single np.convolve(..., mode='valid') pass.
+    """
+    def __init__(self, peak, threshold=0.02, window_size=5):
+        self.scale = np.float32(1.0 / peak) if peak else np.float32(0.0)
+        self.threshold = threshold
+        self.window_size = window_size
+        self.kernel = np.full(window_size, 1.0 / window_size, dtype=np.float32)
+        self.tail = np.empty(0, dtype=np.float32)
+
+    def process(self, block):
+        """Return the smoothed samples that became complete with this block"""
+        block = block * self.scale
+        samples = np.concatenate((self.tail, block[np.abs(block) > self.threshold]))
+        if len(samples) < self.window_size:
+            self.tail = samples
+            return np.empty(0, dtype=np.float32)
+        self.tail = samples[len(samples) - (self.window_size - 1):]
+        return np.convolve(samples, self.kernel, mode='valid')
+
+def iter_mono_blocks(sound, blocksize=BLOCK_SIZE):
+    """Yield float32 mono blocks from an open SoundFile, from the start"""
+    sound.seek(0)
+    for block in sound.blocks(blocksize=blocksize, dtype='float32', always_2d=True):
+        yield block.mean(axis=1) if block.shape[1] > 1 else block[:, 0]
+
+def preprocess_audio_file(source, dest, blocksize=BLOCK_SIZE, threshold=0.02, window_size=5):
+    """
+    Preprocess the audio in source (path or seekable binary stream) into a
+    mono WAV file at dest, at the source's native sample rate.
+    Returns (sample_rate, output frames).
+    """
+    with sf.SoundFile(source) as sound:
+        peak = 0.0
+        for block in iter_mono_blocks(sound, blocksize):
+            if len(block):
+                peak = max(peak, float(np.max(np.abs(block))))
+
+        stage = StreamingPreprocessor(peak, threshold, window_size)
+        frames = 0
+        with sf.SoundFile(dest, 'w', samplerate=sound.samplerate, channels=1,
+                          format='WAV') as out:
+            for block in iter_mono_blocks(sound, blocksize):
+                processed = stage.process(block)
+                out.write(processed)
+                frames += len(processed)
+        return sound.samplerate, frames
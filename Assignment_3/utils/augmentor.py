@@ -1,98 +1,166 @@
+import io
 import numpy as np
 from PIL import Image, ImageEnhance
-import nltk
-from nltk.corpus import wordnet
 import random
-import librosa
+from utils.synonym_index import get_synonyms
 
-# Download required NLTK data
-nltk.download('wordnet')
-nltk.download('averaged_perceptron_tagger')
-
-def augment_image(image):
+def augment_image(image, seed=None):
     """
     Augment image data with basic transformations:
     - Random rotation
     - Random brightness adjustment
     - Random contrast adjustment
+    Pass a seed to get a reproducible result.
     """
+    rng = np.random.default_rng(seed)
+    
     # Convert to RGB if needed
     if image.mode != 'RGB':
         image = image.convert('RGB')
     
     # Random rotation
-    angle = np.random.randint(-30, 30)
+    angle = int(rng.integers(-30, 30))
     image = image.rotate(angle)
     
     # Random brightness
-    brightness_factor = np.random.uniform(0.8, 1.2)
+    brightness_factor = rng.uniform(0.8, 1.2)
     enhancer = ImageEnhance.Brightness(image)
     image = enhancer.enhance(brightness_factor)
     
     # Random contrast
-    contrast_factor = np.random.uniform(0.8, 1.2)
+    contrast_factor = rng.uniform(0.8, 1.2)
     enhancer = ImageEnhance.Contrast(image)
     image = enhancer.enhance(contrast_factor)
     
     return image
 
-def augment_text(text):
+def fused_enhance_luts(brightness, contrast, images):
+    """
+    (K, 256) lookup tables equal to ImageEnhance.Brightness followed by
+    ImageEnhance.Contrast on each of the K images. Contrast blends towards
+    the mean gray level of the brightened image, which is taken the way
+    PIL takes it: from the histogram of its convert('L') copy.
+    """
+    values = np.arange(256, dtype=np.float32)
+    brightness = np.asarray(brightness, dtype=np.float32)[:, None]
+    contrast = np.asarray(contrast, dtype=np.float32)[:, None]
+
+    # Image.blend computes in float32 and truncates
+    bright = np.clip(np.floor(brightness * values), 0, 255)
+
+    # ImageStat mean of the 'L' image, rounded like ImageEnhance.Contrast
+    means = np.empty((len(bright), 1), dtype=np.float32)
+    for i, image in enumerate(images):
+        hist = np.asarray(image.point(np.tile(bright[i], 3).astype(np.uint8).tolist())
+                          .convert('L').histogram(), dtype=np.float64)
+        means[i] = int(hist @ np.arange(256) / hist.sum() + 0.5)
+
+    luts = np.clip(np.floor(means + contrast * (bright - means)), 0, 255)
+    return luts.astype(np.uint8)
+
+def augment_image_batch(images, k, seed=None, encode=None):
+    """
+    K variants of augment_image for one image or a list of images.
+
+    Every variant gets its own rotation, brightness and contrast. The
+    rotation is a single affine pass and brightness and contrast are fused
+    into one lookup table, applied with one point() call.
+
+    Returns a (K, height, width, 3) uint8 array per image, or a list of K
+    encoded images when encode is a PIL format such as 'PNG'. A list of
+    images gives a list of results. Pass a seed to get reproducible variants.
+    """
+    single = isinstance(images, Image.Image)
+    if single:
+        images = [images]
+    rng = np.random.default_rng(seed)
+
+    results = []
+    for image in images:
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        angles = rng.integers(-30, 30, k)
+        brightness = rng.uniform(0.8, 1.2, k)
+        contrast = rng.uniform(0.8, 1.2, k)
+
+        rotated = [image.rotate(int(angle)) for angle in angles]
+        luts = fused_enhance_luts(brightness, contrast, rotated)
+
+        if encode is None:
+            variants = np.empty((k, image.height, image.width, 3), dtype=np.uint8)
+        else:
+            variants = []
+        for i, im in enumerate(rotated):
+            im = im.point(np.tile(luts[i], 3).tolist())
+            if encode is None:
+                variants[i] = np.asarray(im)
+            else:
+                buffer = io.BytesIO()
+                im.save(buffer, format=encode)
+                variants.append(buffer.getvalue())
+        results.append(variants)
+
+    return results[0] if single else results
+
+def augment_text(text, seed=None):
     """
     Augment text data using:
     - Synonym replacement
     - Random word insertion
     - Random word deletion
+    Pass a seed to get a reproducible result.
     """
+    rng = random.Random(seed)
     words = text.split()
     augmented_words = words.copy()
     changes = []
     
     # Synonym replacement
     for i, word in enumerate(words):
-        if random.random() < 0.2:  # 20% chance to replace word
-            synonyms = []
-            for syn in wordnet.synsets(word):
-                for lemma in syn.lemmas():
-                    if lemma.name() != word:
-                        synonyms.append(lemma.name())
+        if rng.random() < 0.2:  # 20% chance to replace word
+            synonyms = get_synonyms(word)
             if synonyms:
-                new_word = random.choice(synonyms)
+                new_word = rng.choice(synonyms)
                 changes.append(f"Replaced '{word}' with '{new_word}'")
                 augmented_words[i] = new_word
     
     # Random word insertion
     if len(words) > 3:
-        insert_pos = random.randint(0, len(augmented_words))
-        insert_word = random.choice(words)
+        insert_pos = rng.randint(0, len(augmented_words))
+        insert_word = rng.choice(words)
         augmented_words.insert(insert_pos, insert_word)
         changes.append(f"Inserted '{insert_word}' at position {insert_pos}")
     
     # Random word deletion
     if len(augmented_words) > 4:
-        delete_pos = random.randint(0, len(augmented_words)-1)
+        delete_pos = rng.randint(0, len(augmented_words)-1)
         deleted_word = augmented_words.pop(delete_pos)
         changes.append(f"Deleted '{deleted_word}' from position {delete_pos}")
     
     return ' '.join(augmented_words), changes
 
-def augment_audio(audio_data):
+def augment_audio(audio_data, seed=None):
     """
     Augment audio data using:
     - Time stretching
     - Pitch shifting
     - Adding noise
+    Pass a seed to get a reproducible result.
     """
+    import librosa
+    rng = np.random.default_rng(seed)
+    
     # Time stretching
-    stretch_factor = np.random.uniform(0.8, 1.2)
+    stretch_factor = rng.uniform(0.8, 1.2)
     audio_stretched = librosa.effects.time_stretch(audio_data, rate=stretch_factor)
     
     # Pitch shifting
-    n_steps = np.random.randint(-2, 3)
+    n_steps = int(rng.integers(-2, 3))
     audio_pitched = librosa.effects.pitch_shift(audio_stretched, sr=22050, n_steps=n_steps)
     
     # Add random noise
     noise_factor = 0.005
-    noise = np.random.normal(0, noise_factor, len(audio_pitched))
+    noise = rng.normal(0, noise_factor, len(audio_pitched))
     augmented_audio = audio_pitched + noise
     
     # Normalize
@@ -100,18 +168,106 @@ def augment_audio(audio_data):
     
     return augmented_audio
 
-def augment_3d(points):
+def batch_phase_vocoder(stft, rates, hop_length):
+    """
+    librosa.phase_vocoder for several rates at once. Returns a
+    (K, freq, frames) array padded with silent frames up to the longest
+    variant, and the number of frames of each variant.
+    """
+    n_bins, n_frames = stft.shape
+    n_steps = np.ceil(n_frames / rates).astype(np.int64)
+    steps = np.arange(n_steps.max())[None, :] * rates[:, None]  # (K, T)
+    valid = np.arange(n_steps.max())[None, :] < n_steps[:, None]
+    steps = np.where(valid, steps, 0.0)
+
+    # Two silent frames at the end, as phase_vocoder pads
+    stft = np.pad(stft, [(0, 0), (0, 2)])
+    magnitude = np.abs(stft).astype(np.float32)
+    phase = np.angle(stft)
+    phi_advance = np.linspace(0, np.pi * hop_length, n_bins)[:, None]
+    # Phase advance from every input frame to the next, wrapped to [0, 2pi)
+    # so the float32 running sum below stays precise
+    dphase = phase[:, 1:] - phase[:, :-1] - phi_advance
+    dphase -= 2.0 * np.pi * np.round(dphase / (2.0 * np.pi))
+    frame_advance = np.mod(phi_advance + dphase, 2.0 * np.pi).astype(np.float32)
+
+    index = steps.astype(np.int64)
+    alpha = (steps - index).astype(np.float32)
+    mag = (1.0 - alpha) * magnitude[:, index] + alpha * magnitude[:, index + 1]  # (F, K, T)
+    mag *= valid
+
+    # The accumulated phase of output frame t is the sum of the advances of
+    # the input frames visited by steps 0..t-1
+    advance = frame_advance[:, index]
+    phase_acc = np.cumsum(advance, axis=2)
+    phase_acc -= advance
+    phase_acc += phase[:, 0, None, None].astype(np.float32)
+
+    stretched = np.empty(mag.shape, dtype=np.complex64)
+    stretched.real = mag * np.cos(phase_acc)
+    stretched.imag = mag * np.sin(phase_acc)
+    return stretched.transpose(1, 0, 2), n_steps
+
+def augment_audio_batch(audio_data, k, sr=22050, seed=None, n_fft=2048, hop_length=512):
+    """
+    K variants of augment_audio from a single STFT, as a (K, samples) array.
+
+    Each variant draws its own stretch factor, pitch shift and noise like
+    augment_audio. Time stretch and the stretch half of pitch shifting are
+    combined into one phase-vocoder rate, all K rates are vocoded at once
+    and inverted with one batched ISTFT; only the pitch-shift resampling
+    runs per distinct shift. Variants are cropped or zero-padded to the
+    input length so they stack. Pass a seed to get reproducible variants.
+    """
+    import librosa
+    rng = np.random.default_rng(seed)
+    audio_data = np.asarray(audio_data, dtype=np.float32)
+    n_samples = len(audio_data)
+
+    stretch_factors = rng.uniform(0.8, 1.2, k)
+    n_steps = rng.integers(-2, 3, k)
+    pitch_rates = 2.0 ** (-n_steps / 12.0)
+
+    stft = librosa.stft(audio_data, n_fft=n_fft, hop_length=hop_length)
+    rates = stretch_factors * pitch_rates
+    stretched, _ = batch_phase_vocoder(stft, rates, hop_length)
+    max_length = int(round(n_samples / rates.min()))
+    audio_stretched = librosa.istft(stretched, hop_length=hop_length, n_fft=n_fft,
+                                    length=max_length)
+
+    # Resample each pitch group back to sr, as pitch_shift does
+    augmented = np.zeros((k, n_samples), dtype=np.float32)
+    for steps in np.unique(n_steps):
+        group = np.flatnonzero(n_steps == steps)
+        pitch_rate = 2.0 ** (-steps / 12.0)
+        audio_group = audio_stretched[group]
+        if steps != 0:
+            audio_group = librosa.resample(audio_group, orig_sr=sr / pitch_rate, target_sr=sr,
+                                           res_type='soxr_hq')
+        for row, i in zip(audio_group, group):
+            # Length after time_stretch; pitch_shift keeps it
+            length = min(int(round(n_samples / stretch_factors[i])), n_samples, len(row))
+            augmented[i, :length] = row[:length]
+
+    # Add random noise and normalize every variant
+    augmented += 0.005 * rng.standard_normal(augmented.shape, dtype=np.float32)
+    augmented /= np.max(np.abs(augmented), axis=1, keepdims=True)
+    return augmented
+
+def augment_3d(points, seed=None):
     """
     Augment 3D point cloud using:
     - Random rotation
     - Random scaling
     - Random translation
     - Random jittering
+    Pass a seed to get a reproducible result.
     """
+    rng = np.random.default_rng(seed)
     augmented_points = points.copy()
     
     # Random rotation around z-axis
-    theta = np.random.uniform(0, 2*np.pi)
+    theta = rng.uniform(0, 2*np.pi)
     rotation_matrix = np.array([
         [np.cos(theta), -np.sin(theta), 0],
         [np.sin(theta), np.cos(theta), 0],
@@ -120,15 +276,15 @@ def augment_3d(points):
     augmented_points = np.dot(augmented_points, rotation_matrix)
     
     # Random scaling
-    scale_factor = np.random.uniform(0.8, 1.2)
+    scale_factor = rng.uniform(0.8, 1.2)
     augmented_points *= scale_factor
     
     # Random translation
-    translation = np.random.uniform(-0.1, 0.1, size=3)
+    translation = rng.uniform(-0.1, 0.1, size=3)
     augmented_points += translation
     
     # Random jittering
-    jitter = np.random.normal(0, 0.02, size=augmented_points.shape)
+    jitter = rng.normal(0, 0.02, size=augmented_points.shape)
     augmented_points += jitter
     
     return augmented_points
\ No newline at end of file
@@ -0,0 +1,128 @@
+import io
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from utils.pipeline import MODALITIES, run_item
+
+# Used when a batch is submitted with input_type=auto
+EXTENSION_TYPES = {
+    '.txt': 'text',
+    '.png': 'image',
+    '.jpg': 'image',
+    '.jpeg': 'image',
+    '.bmp': 'image',
+    '.gif': 'image',
+    '.tif': 'image',
+    '.tiff': 'image',
+    '.wav': 'audio',
+    '.flac': 'audio',
+    '.ogg': 'audio',
+    '.mp3': 'audio',
+    '.ply': '3d',
+}
+
+def infer_input_type(filename):
+    """Guess the input type from the file extension, None if unknown"""
+    return EXTENSION_TYPES.get(os.path.splitext(filename)[1].lower())
+
+def is_zip_upload(file):
+    return (file.filename.lower().endswith('.zip') or
+            file.mimetype in ('application/zip', 'application/x-zip-compressed'))
+
+def iter_batch_items(files, input_type='auto', max_item_bytes=None):
+    """
+    Yield (filename, input_type, data) for every uploaded file, expanding
+    zip archives into their members. input_type is None when it cannot be
+    resolved and data is None when the item is over max_item_bytes.
+    """
+    def resolve(filename):
+        if input_type == 'auto':
+            return infer_input_type(filename)
+        return input_type if input_type in MODALITIES else None
+
+    for file in files:
+        if is_zip_upload(file):
+            with zipfile.ZipFile(file.stream) as archive:
+                for member in archive.infolist():
+                    name = member.filename
+                    if member.is_dir() or name.startswith('__MACOSX/'):
+                        continue
+                    if max_item_bytes and member.file_size > max_item_bytes:
+                        yield name, resolve(name), None
+                        continue
+                    yield name, resolve(name), archive.read(member)
+        else:
+            data = file.stream.read(max_item_bytes + 1 if max_item_bytes else -1)
+            if max_item_bytes and len(data) > max_item_bytes:
+                data = None
+            yield file.filename, resolve(file.filename), data
+
+def process_batch_item(index, filename, input_type, action, data, seed=None):
+    """Process one batch item inside a worker process"""
+    try:
+        result = run_item(input_type, action, io.BytesIO(data), seed=seed)
+        return {'index': index, 'filename': filename, 'input_type': input_type,
+                'status': 'ok', 'result': result}
+    except Exception as e:
+        return {'index': index, 'filename': filename, 'input_type': input_type,
+                'status': 'error', 'error': str(e)}
+
+class BatchProcessor:
+    """
+    Fans batch items out to a process pool and yields results as they finish.
+
+    At most max_pending items are in flight at once, so a large archive is
+    read and dispatched incrementally instead of being loaded up front.
+    """
+
+    def __init__(self, max_workers=None, max_pending=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.max_workers * 2
+        self._pool = None
+
+    @property
+    def pool(self):
+        # Created on first use so importing the app does not fork workers.
+        # Workers start from a forkserver: forking the app itself would copy
+        # locks held by its janitor and request threads.
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                             mp_context=multiprocessing.get_context('forkserver'))
+        return self._pool
+
+    def run(self, items, action, seed=None):
+        """Yield one result dict per (filename, input_type, data) item"""
+        pending = set()
+        try:
+            for index, (filename, input_type, data) in enumerate(items):
+                if input_type is None:
+                    yield {'index': index, 'filename': filename, 'input_type': None,
+                           'status': 'error', 'error': 'Unknown input type'}
+                    continue
+                if data is None:
+                    yield {'index': index, 'filename': filename, 'input_type': input_type,
+                           'status': 'error', 'error': 'File too large'}
+                    continue
+
+                pending.add(self.pool.submit(process_batch_item, index, filename,
+                                             input_type, action, data, seed))
+                # Keep the number of queued items bounded
+                while len(pending) >= self.max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            # Client went away: drop the items that have not started yet
+            for future in pending:
+                future.cancel()
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,127 @@
+import heapq
+import os
+import threading
+import time
+
+
+class UploadJanitor:
+    """
+    Deletes expired uploads from a background thread.
+
+    Files are kept in a min-heap keyed by creation time, so every sweep only
+    looks at the oldest entries instead of walking and stat-ing the whole
+    upload tree. The heap is seeded once from disk and then updated through
+    track() whenever the app writes a file.
+    """
+
+    def __init__(self, root, ttl=3600, max_bytes=0, interval=60):
+        self.root = root
+        self.ttl = ttl  # seconds a file is kept
+        self.max_bytes = max_bytes  # disk usage cap, 0 disables it
+        self.interval = interval  # seconds between sweeps
+
+        self._heap = []  # (created_at, path)
+        self._files = {}  # path -> (created_at, size)
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def seed(self):
+        """Index the files already on disk"""
+        for root, dirs, files in os.walk(self.root):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    created_at = os.path.getctime(path)
+                except OSError:
+                    continue
+                self.track(path, created_at)
+
+    def track(self, path, created_at=None):
+        """Register a newly written file"""
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        if created_at is None:
+            created_at = time.time()
+
+        with self._lock:
+            previous = self._files.get(path)
+            if previous is not None:
+                self._total_bytes -= previous[1]
+            self._files[path] = (created_at, size)
+            self._total_bytes += size
+            heapq.heappush(self._heap, (created_at, path))
+            over_cap = self.max_bytes and self._total_bytes > self.max_bytes
+
+        if over_cap:
+            self._wake.set()
+
+    def sweep(self, now=None):
+        """Delete expired files and, if over the cap, the oldest ones"""
+        if now is None:
+            now = time.time()
+
+        expired = []
+        with self._lock:
+            while self._heap:
+                created_at, path = self._heap[0]
+                entry = self._files.get(path)
+                if entry is None or entry[0] != created_at:
+                    # Stale heap entry for a file that was re-tracked or removed
+                    heapq.heappop(self._heap)
+                    continue
+                too_old = now - created_at > self.ttl
+                too_big = self.max_bytes and self._total_bytes > self.max_bytes
+                if not (too_old or too_big):
+                    break
+                heapq.heappop(self._heap)
+                del self._files[path]
+                self._total_bytes -= entry[1]
+                expired.append(path)
+
+        # Remove files outside the lock so uploads are never blocked on disk I/O
+        for path in expired:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Error removing {path}: {str(e)}")
+        return len(expired)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'files': len(self._files),
+                'bytes': self._total_bytes,
+                'ttl': self.ttl,
+                'max_bytes': self.max_bytes,
+            }
+
+    def start(self):
+        """Seed the index and start the background thread"""
+        if self._thread is not None:
+            return
+        self.seed()
+        self._thread = threading.Thread(target=self._run, name='upload-janitor', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Upload janitor error: {str(e)}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
@@ -0,0 +1,224 @@
+import io
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from utils.pipeline import run_item
+
+FINISHED = ('done', 'error', 'cancelled')
+
+class QueueFull(Exception):
+    """Raised by JobQueue.submit when max_queued jobs are already waiting"""
+
+def run_job(input_type, action, data, seed=None):
+    """Process one job inside a worker process"""
+    return run_item(input_type, action, io.BytesIO(data), seed=seed)
+
+class Job:
+    def __init__(self, input_type, action, filename, data, seed, finalize):
+        self.id = uuid.uuid4().hex
+        self.input_type = input_type
+        self.action = action
+        self.filename = filename
+        self.data = data
+        self.seed = seed
+        self.finalize = finalize
+        self.status = 'queued'
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.version = 0  # bumped on every status change, for event streams
+
+    def to_dict(self, queue_position=None):
+        info = {
+            'job_id': self.id,
+            'status': self.status,
+            'input_type': self.input_type,
+            'action': self.action,
+            'filename': self.filename,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+        if queue_position is not None:
+            info['queue_position'] = queue_position
+        if self.status == 'done':
+            info['result'] = self.result
+        elif self.status == 'error':
+            info['error'] = self.error
+        return info
+
+class JobQueue:
+    """
+    Runs /process work in the background on a process pool.
+
+    Jobs wait in a bounded FIFO and are handed to the pool only when a
+    worker is free, so queued jobs can be cancelled outright and the pool
+    never holds more than max_workers items. Finished jobs are kept for ttl
+    seconds so clients can collect the result.
+    """
+
+    def __init__(self, max_workers=None, max_queued=32, ttl=600):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queued = max_queued
+        self.ttl = ttl
+        self._pool = None
+        self._jobs = OrderedDict()  # id -> Job, in submission order
+        self._queue = deque()
+        self._running = 0
+        self._changed = threading.Condition(threading.RLock())
+        self.counters = {'submitted': 0, 'rejected': 0, 'done': 0, 'error': 0,
+                         'cancelled': 0}
+        self._started = 0
+        self._wait_seconds = 0.0
+        self._ran = 0
+        self._run_seconds = 0.0
+
+    @property
+    def pool(self):
+        # Lazy and forkserver-started for the same reasons as BatchProcessor.pool
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                             mp_context=multiprocessing.get_context('forkserver'))
+        return self._pool
+
+    def submit(self, input_type, action, filename, data, seed=None, finalize=None):
+        """
+        Queue a job and return its id. finalize, if given, is applied to the
+        payload when the job completes. Raises QueueFull when the queue is at
+        max_queued.
+        """
+        with self._changed:
+            self._expire()
+            if len(self._queue) >= self.max_queued:
+                self.counters['rejected'] += 1
+                raise QueueFull(f'{len(self._queue)} jobs already queued')
+            job = Job(input_type, action, filename, data, seed, finalize)
+            self._jobs[job.id] = job
+            self._queue.append(job)
+            self.counters['submitted'] += 1
+            self._dispatch()
+            return job.id
+
+    def _dispatch(self):
+        """Start queued jobs while workers are free. Called with the lock held"""
+        while self._queue and self._running < self.max_workers:
+            job = self._queue.popleft()
+            job.status = 'running'
+            job.started_at = time.time()
+            job.version += 1
+            self._started += 1
+            self._wait_seconds += job.started_at - job.submitted_at
+            self._running += 1
+            try:
+                future = self.pool.submit(run_job, job.input_type, job.action, job.data, job.seed)
+            except Exception as e:
+                # e.g. a broken pool after a worker crashed
+                self._running -= 1
+                job.status, job.error, job.finished_at = 'error', str(e), time.time()
+                job.version += 1
+                self.counters['error'] += 1
+                continue
+            finally:
+                job.data = None  # the worker has its own copy now
+            future.add_done_callback(lambda future, job=job: self._finish(job, future))
+        self._changed.notify_all()
+
+    def _finish(self, job, future):
+        try:
+            payload = future.result()
+            if job.finalize is not None:
+                payload = job.finalize(payload)
+            error = None
+        except Exception as e:
+            payload, error = None, str(e)
+
+        with self._changed:
+            self._running -= 1
+            finished_at = time.time()
+            self._ran += 1
+            self._run_seconds += finished_at - job.started_at
+            # A job cancelled while running keeps its 'cancelled' status
+            if job.status == 'running':
+                job.status = 'error' if error is not None else 'done'
+                job.result, job.error = payload, error
+                job.finished_at = finished_at
+                job.version += 1
+                self.counters[job.status] += 1
+            self._dispatch()
+
+    def cancel(self, job_id):
+        """
+        Cancel a queued or running job. A running job's worker finishes the
+        item but its result is dropped. Returns the job info, None if the job
+        is unknown, or raises ValueError if it has already finished.
+        """
+        with self._changed:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.status in FINISHED:
+                raise ValueError(f'Job is already {job.status}')
+            if job.status == 'queued':
+                self._queue.remove(job)
+                job.data = None
+            job.status = 'cancelled'
+            job.finished_at = time.time()
+            job.version += 1
+            self.counters['cancelled'] += 1
+            self._changed.notify_all()
+            return job.to_dict()
+
+    def get(self, job_id):
+        """Job info as a dict, None if unknown or expired"""
+        with self._changed:
+            self._expire()
+            job = self._jobs.get(job_id)
+            return None if job is None else job.to_dict(self._position(job))
+
+    def wait(self, job_id, version, timeout=None):
+        """
+        Block until the job's version differs from version (or timeout) and
+        return (info, version). info is None if the job is unknown.
+        """
+        with self._changed:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None, version
+            self._changed.wait_for(lambda: job.version != version, timeout)
+            return job.to_dict(self._position(job)), job.version
+
+    def _position(self, job):
+        if job.status != 'queued':
+            return None
+        return self._queue.index(job)
+
+    def _expire(self):
+        """Forget finished jobs older than ttl. Called with the lock held"""
+        cutoff = time.time() - self.ttl
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.status in FINISHED and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def metrics(self):
+        with self._changed:
+            return {
+                'queued': len(self._queue),
+                'running': self._running,
+                'max_workers': self.max_workers,
+                'max_queued': self.max_queued,
+                'jobs_tracked': len(self._jobs),
+                **self.counters,
+                'avg_wait_seconds': self._wait_seconds / self._started if self._started else None,
+                'avg_run_seconds': self._run_seconds / self._ran if self._ran else None,
+            }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,150 @@
+"""
+In-process metrics in the Prometheus text format.
+
+Code paths time themselves with `with stage('decode'):`. The input type and
+action labels come from the surrounding `with labels(input_type, action):`
+block, so modality code does not need to pass them around. With
+METRICS_ENABLED=false both are shared no-op context managers.
+
+Metrics are per process: work done in batch or job worker processes is not
+recorded here.
+"""
+import bisect
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BYTES_BUCKETS = (1e3, 1e4, 1e5, 1e6, 1e7, 1e8, 1e9)
+
+_local = threading.local()
+_no_op = nullcontext()
+
+def format_labels(names, values, extra=''):
+    pairs = [f'{name}="{escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class Histogram:
+    def __init__(self, name, help, label_names, buckets):
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * len(self.buckets) + [0.0, 0]
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def expose(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        for label_values, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                le = format_labels(self.label_names, label_values, f'le="{bound:g}"')
+                lines.append(f'{self.name}_bucket{le} {cumulative}')
+            le = format_labels(self.label_names, label_values, 'le="+Inf"')
+            lines.append(f'{self.name}_bucket{le} {values[-1]}')
+            plain = format_labels(self.label_names, label_values)
+            lines.append(f'{self.name}_sum{plain} {values[-2]}')
+            lines.append(f'{self.name}_count{plain} {values[-1]}')
+        return lines
+
+class Counter:
+    def __init__(self, name, help, label_names):
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + 1
+
+    def expose(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            values = dict(self._values)
+        for label_values, value in sorted(values.items()):
+            lines.append(f'{self.name}{format_labels(self.label_names, label_values)} {value}')
+        return lines
+
+stage_seconds = Histogram('pipeline_stage_seconds', 'Time spent in each processing stage.',
+                          ('stage', 'input_type', 'action'), SECONDS_BUCKETS)
+payload_bytes = Histogram('pipeline_payload_bytes', 'Size of uploads and responses.',
+                          ('direction', 'input_type', 'action'), BYTES_BUCKETS)
+errors_total = Counter('pipeline_errors_total', 'Exceptions, by the innermost stage they were raised in.',
+                       ('stage', 'input_type', 'action'))
+REGISTRY = (stage_seconds, payload_bytes, errors_total)
+
+class labels:
+    """Set the input_type/action labels for stages run by this thread"""
+    def __init__(self, input_type, action):
+        self.values = (input_type or '', action or '')
+
+    def __enter__(self):
+        self.previous = getattr(_local, 'labels', ('', ''))
+        _local.labels = self.values
+        return self
+
+    def __exit__(self, *exc_info):
+        _local.labels = self.previous
+        return False
+
+class _Stage:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        input_type, action = getattr(_local, 'labels', ('', ''))
+        stage_seconds.observe(elapsed, self.name, input_type, action)
+        # Count an exception once, in the stage it was raised in, not again
+        # in every enclosing stage it passes through. The mark lives on the
+        # exception itself, so it goes away with it
+        if exc is not None and not getattr(exc, '_stage_counted', False):
+            exc._stage_counted = True
+            errors_total.inc(self.name, input_type, action)
+        return False
+
+def stage(name):
+    """Context manager timing one stage under the current labels"""
+    return _Stage(name) if METRICS_ENABLED else _no_op
+
+def observe_bytes(direction, size):
+    if METRICS_ENABLED:
+        input_type, action = getattr(_local, 'labels', ('', ''))
+        payload_bytes.observe(size, direction, input_type, action)
+
+def expose():
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.expose())
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,2 @@
+# Per-input-type processing plugins, imported lazily by utils.pipeline.
+# Each module exposes process(source, action, seed=None) -> dict.
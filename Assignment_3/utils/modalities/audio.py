@@ -0,0 +1,73 @@
+"""Audio modality: decoded with librosa, visualised with matplotlib"""
+import io
+import matplotlib
+matplotlib.use('Agg')  # librosa.display imports pyplot, keep it off any GUI backend
+import librosa
+import librosa.display
+import numpy as np
+import soundfile as sf
+from utils.preprocessor import preprocess_audio
+from utils.augmentor import augment_audio
+from utils.waveform import render_waveform
+from utils.audio_stream import preprocess_audio_file
+from utils.artifacts import Artifact
+from utils.renderer import render, render_mimetype
+from utils.metrics import stage
+
+def stream(source, action, dest):
+    """Preprocess a long recording block by block into a WAV file at dest"""
+    if action != 'preprocess':
+        raise ValueError('Streaming is only supported for audio preprocessing')
+    return preprocess_audio_file(source, dest)
+
+def process(source, action, seed=None):
+    with stage('decode'):
+        audio_data, sr = librosa.load(source)
+    
+    if action == 'preprocess':
+        # Includes drawing the waveform envelope
+        with stage('preprocess'):
+            processed_audio, vis_buffer = preprocess_audio(audio_data, sr)
+        
+        # Create audio buffer
+        with stage('encode'):
+            audio_buffer = io.BytesIO()
+            sf.write(audio_buffer, processed_audio, sr, format='WAV')
+        
+        return {
+            'visualizations': Artifact(vis_buffer.getvalue(), 'image/png'),
+            'preprocessed_audio': Artifact(audio_buffer.getvalue(), 'audio/wav')
+        }
+        
+    else:  # augment
+        with stage('augment'):
+            augmented_audio = augment_audio(audio_data, seed=seed)
+        
+        # Generate visualizations
+        def draw(fig):
+            ax = fig.add_subplot(2, 1, 1)
+            # Peak envelope drawn as a single image instead of one vertex per sample
+            duration = len(augmented_audio) / sr
+            ax.imshow(render_waveform(augmented_audio, width=1000, height=200, amplitude=1.0),
+                      aspect='auto', extent=[0, duration, -1, 1])
+            ax.set_xlabel('Time')
+            ax.set_title("Augmented Audio Waveform")
+            
+            ax = fig.add_subplot(2, 1, 2)
+            spec = librosa.feature.melspectrogram(y=augmented_audio, sr=sr)
+            librosa.display.specshow(librosa.power_to_db(spec, ref=np.max), sr=sr,
+                                     y_axis='mel', x_axis='time', ax=ax)
+            ax.set_title("Augmented Mel Spectrogram")
+            fig.tight_layout()
+        
+        with stage('render'):
+            vis_buffer = render(draw, figsize=(10, 6), name='audio_augment')
+        
+        with stage('encode'):
+            audio_buffer = io.BytesIO()
+            sf.write(audio_buffer, augmented_audio, sr, format='WAV')
+        
+        return {
+            'visualizations': Artifact(vis_buffer.getvalue(), render_mimetype()),
+            'augmented_audio': Artifact(audio_buffer.getvalue(), 'audio/wav')
+        }
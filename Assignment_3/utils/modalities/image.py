@@ -0,0 +1,39 @@
+"""Image modality: anything PIL can decode"""
+import io
+from PIL import Image
+from utils.preprocessor import preprocess_image
+from utils.augmentor import augment_image
+from utils.artifacts import Artifact
+from utils.metrics import stage
+
+def process(source, action, seed=None):
+    # Only the header is read here; pixels are decoded in the action stage
+    # (preprocess_image decodes JPEGs at reduced size)
+    with stage('decode'):
+        image = Image.open(source)
+    
+    if action == 'preprocess':
+        with stage('preprocess'):
+            processed_image, display_info = preprocess_image(image)
+        
+        # Save processed image
+        with stage('encode'):
+            buffer = io.BytesIO()
+            processed_image.save(buffer, format='PNG')
+        
+        return {
+            'preprocessed_image': Artifact(buffer.getvalue(), 'image/png'),
+            'display_info': display_info
+        }
+        
+    else:  # augment
+        with stage('augment'):
+            augmented_image = augment_image(image, seed=seed)
+        
+        with stage('encode'):
+            buffer = io.BytesIO()
+            augmented_image.save(buffer, format='PNG')
+        
+        return {
+            'augmented_image': Artifact(buffer.getvalue(), 'image/png')
+        }
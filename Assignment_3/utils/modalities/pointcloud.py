@@ -0,0 +1,66 @@
+"""3D modality: PLY point clouds"""
+import os
+from utils.ply_reader import read_ply_points
+from utils.preprocessor import preprocess_3d
+from utils.augmentor import augment_3d
+from utils.pointcloud_render import voxel_downsample, render_points_png
+from utils.artifacts import Artifact
+from utils.renderer import render, render_mimetype
+from utils.metrics import stage
+
+# 'raster' projects a voxel-downsampled cloud with the NumPy z-buffer
+# renderer; 'matplotlib' draws an Axes3D scatter of the downsampled cloud
+POINT_CLOUD_RENDER = os.environ.get('POINT_CLOUD_RENDER', 'raster')
+# Number of points the cloud is reduced to before it is drawn
+POINT_CLOUD_RENDER_BUDGET = int(os.environ.get('POINT_CLOUD_RENDER_BUDGET', 100000))
+POINT_CLOUD_PROJECTION = os.environ.get('POINT_CLOUD_PROJECTION', 'perspective')
+# Outlier removal in preprocess: 'std' (per axis) or 'sor' (KD-tree neighbours)
+POINT_CLOUD_OUTLIERS = os.environ.get('POINT_CLOUD_OUTLIERS', 'std')
+
+def render_cloud(points, title, color):
+    """Render a point cloud to an image Artifact"""
+    if POINT_CLOUD_RENDER == 'raster':
+        rgb = {'b': (0, 0, 255), 'r': (255, 0, 0)}[color]
+        buffer = render_points_png(points, max_points=POINT_CLOUD_RENDER_BUDGET,
+                                   projection=POINT_CLOUD_PROJECTION, color=rgb, title=title)
+        return Artifact(buffer.getvalue(), 'image/png')
+
+    from mpl_toolkits.mplot3d import Axes3D  # registers the '3d' projection
+    
+    points = voxel_downsample(points, POINT_CLOUD_RENDER_BUDGET)
+    
+    def draw(fig):
+        ax = fig.add_subplot(111, projection='3d')
+        ax.scatter(points[:, 0],
+                  points[:, 1],
+                  points[:, 2],
+                  c=color, marker='.')
+        ax.set_xlabel('X')
+        ax.set_ylabel('Y')
+        ax.set_zlabel('Z')
+        ax.set_title(title)
+    
+    buffer = render(draw, figsize=(10, 6), name='pointcloud')
+    return Artifact(buffer.getvalue(), render_mimetype())
+
+def process(source, action, seed=None):
+    """Process 3D point cloud data"""
+    # Binary PLYs are memory-mapped (saved files) or wrapped in place
+    # (in-memory uploads); only ASCII files are parsed by plyfile
+    with stage('decode'):
+        points = read_ply_points(source)
+
+    if action == 'preprocess':
+        with stage('preprocess'):
+            processed_points = preprocess_3d(points, outlier_method=POINT_CLOUD_OUTLIERS)
+        with stage('render'):
+            visualization = render_cloud(processed_points, "Preprocessed 3D Data", 'b')
+    else:  # augment
+        with stage('augment'):
+            augmented_points = augment_3d(points, seed=seed)
+        with stage('render'):
+            visualization = render_cloud(augmented_points, "Augmented 3D Data", 'r')
+
+    return {
+        'visualization': visualization
+    }
@@ -0,0 +1,48 @@
+"""Text modality: plain-text uploads"""
+from utils.preprocessor import preprocess_text, iter_preprocess_text
+from utils.augmentor import augment_text
+from utils.metrics import stage
+from utils.synonym_index import load_index
+
+def preload():
+    """Load the synonym index at startup instead of on the first augment"""
+    load_index()
+
+def read_text_source(source):
+    """Read text from a saved file path or an in-memory upload stream"""
+    if isinstance(source, str):
+        with open(source, 'r') as f:
+            return f.read()
+    return source.read().decode('utf-8')
+
+def iter_source_chunks(source, chunk_size=1024 * 1024):
+    """Yield the raw bytes of a saved file path or a binary stream"""
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            yield from iter(lambda: f.read(chunk_size), b'')
+    else:
+        yield from iter(lambda: source.read(chunk_size), b'')
+
+def stream(source, action):
+    """Preprocess a text upload chunk by chunk, yielding the output text"""
+    if action != 'preprocess':
+        raise ValueError('Streaming is only supported for text preprocessing')
+    return iter_preprocess_text(iter_source_chunks(source))
+
+def process(source, action, seed=None):
+    with stage('decode'):
+        text = read_text_source(source)
+    
+    if action == 'preprocess':
+        with stage('preprocess'):
+            preprocessed_text = preprocess_text(text)
+        return {
+            'preprocessed_text': preprocessed_text
+        }
+    else:  # augment
+        with stage('augment'):
+            augmented_text, changes = augment_text(text, seed=seed)
+        return {
+            'augmented_text': augmented_text,
+            'changes': changes
+        }
@@ -0,0 +1,64 @@
+import importlib
+import threading
+import time
+
+# Processing entry points shared by the Flask routes and the batch workers.
+# Each input type is handled by a plugin module under utils/modalities that
+# is only imported the first time that type is requested, so a worker never
+# pays for librosa or matplotlib unless it actually serves audio or 3D.
+# Every handler takes a saved file path or a binary file-like object and
+# returns a JSON-serialisable dict.
+MODALITIES = {
+    'text': 'utils.modalities.text',
+    'image': 'utils.modalities.image',
+    'audio': 'utils.modalities.audio',
+    '3d': 'utils.modalities.pointcloud',
+}
+
+_loaded = {}  # input_type -> module
+_load_seconds = {}  # input_type -> import time
+_lock = threading.Lock()
+
+def load_modality(input_type):
+    """Import the plugin for input_type on first use"""
+    module = _loaded.get(input_type)
+    if module is not None:
+        return module
+    if input_type not in MODALITIES:
+        raise ValueError(f'Invalid input type: {input_type}')
+    with _lock:
+        if input_type not in _loaded:
+            start = time.perf_counter()
+            _loaded[input_type] = importlib.import_module(MODALITIES[input_type])
+            _load_seconds[input_type] = time.perf_counter() - start
+            print(f"Loaded {input_type} modality in {_load_seconds[input_type]:.2f}s")
+    return _loaded[input_type]
+
+def preload(input_types):
+    """
+    Import plugins ahead of the first request, 'all' loads every one. A
+    plugin that defines preload() also gets to load its data files here.
+    """
+    if 'all' in input_types:
+        input_types = list(MODALITIES)
+    for input_type in input_types:
+        module = load_modality(input_type)
+        if hasattr(module, 'preload'):
+            module.preload()
+
+def modality_status():
+    return {input_type: {'loaded': input_type in _loaded,
+                         'load_seconds': _load_seconds.get(input_type)}
+            for input_type in MODALITIES}
+
+def run_item(input_type, action, source, seed=None):
+    """Process one upload and return the response payload"""
+    return load_modality(input_type).process(source, action, seed=seed)
+
+def stream_text(source, action):
+    """Preprocess a text upload chunk by chunk, yielding the output text"""
+    return load_modality('text').stream(source, action)
+
+def stream_audio(source, action, dest):
+    """Preprocess an audio upload block by block into a WAV file at dest"""
+    return load_modality('audio').stream(source, action, dest)
@@ -0,0 +1,174 @@
+import io
+
+import numpy as np
+
+# PLY scalar types and their NumPy equivalents
+PLY_TYPES = {
+    'char': 'i1', 'int8': 'i1',
+    'uchar': 'u1', 'uint8': 'u1',
+    'short': 'i2', 'int16': 'i2',
+    'ushort': 'u2', 'uint16': 'u2',
+    'int': 'i4', 'int32': 'i4',
+    'uint': 'u4', 'uint32': 'u4',
+    'float': 'f4', 'float32': 'f4',
+    'double': 'f8', 'float64': 'f8',
+}
+BYTE_ORDERS = {'binary_little_endian': '<', 'binary_big_endian': '>'}
+# Bytes of an in-memory file searched for the header before looking further
+HEADER_PREFIX = 65536
+
+def parse_header(lines):
+    """
+    Parse PLY header lines (bytes, without the 'ply' magic) into the format
+    and a list of (element name, count, properties). A property is
+    (name, type) for scalars and (name, None) for lists.
+    """
+    fmt = None
+    elements = []
+    for line in lines:
+        words = line.decode('ascii', 'replace').split()
+        if not words or words[0] in ('comment', 'obj_info'):
+            continue
+        if words[0] == 'format':
+            fmt = words[1]
+        elif words[0] == 'element':
+            elements.append((words[1], int(words[2]), []))
+        elif words[0] == 'property':
+            if words[1] == 'list':
+                elements[-1][2].append((words[-1], None))
+            else:
+                elements[-1][2].append((words[2], PLY_TYPES[words[1]]))
+    return fmt, elements
+
+def read_header(f):
+    """Read the header from a binary file object, return (fmt, elements, size)"""
+    if f.readline().strip() != b'ply':
+        raise ValueError('Not a PLY file')
+    lines = []
+    while True:
+        line = f.readline()
+        if not line:
+            raise ValueError('PLY header is not terminated')
+        if line.strip() == b'end_header':
+            break
+        lines.append(line)
+    fmt, elements = parse_header(lines)
+    return fmt, elements, f.tell()
+
+def read_buffer_header(buffer):
+    """read_header for an in-memory file, copying only a prefix of it"""
+    view = memoryview(buffer)
+    size = HEADER_PREFIX
+    while True:
+        prefix = bytes(view[:size])
+        if b'end_header' in prefix or size >= len(view):
+            return read_header(io.BytesIO(prefix))
+        size *= 4
+
+def vertex_layout(fmt, elements, header_size):
+    """
+    Structured dtype, count and byte offset of the vertex block, or None when
+    the block cannot be addressed directly (ASCII, or a list property before
+    or inside the vertices).
+    """
+    byte_order = BYTE_ORDERS.get(fmt)
+    if byte_order is None:
+        return None
+    offset = header_size
+    for name, count, properties in elements:
+        if any(ply_type is None for _, ply_type in properties):
+            return None
+        dtype = np.dtype([(prop, byte_order + ply_type) for prop, ply_type in properties])
+        if name == 'vertex':
+            return dtype, count, offset
+        offset += count * dtype.itemsize
+    return None
+
+def xyz_view(vertices):
+    """
+    (N, 3) float32 view of the x, y, z fields. When they are adjacent
+    little-endian floats this is a strided view into the same memory,
+    otherwise the three columns are copied once.
+    """
+    fields = vertices.dtype.fields
+    offsets = [fields[axis][1] for axis in ('x', 'y', 'z')]
+    types = [fields[axis][0] for axis in ('x', 'y', 'z')]
+    if (all(t == np.dtype('<f4') for t in types) and
+            offsets == [offsets[0], offsets[0] + 4, offsets[0] + 8]):
+        # Strides are given explicitly: viewing a strided slice as another
+        # dtype needs NumPy 1.23 when the vertex has more than x, y, z
+        return np.ndarray((len(vertices), 3), dtype='<f4', buffer=vertices,
+                          offset=offsets[0], strides=(vertices.dtype.itemsize, 4))
+    points = np.empty((len(vertices), 3), dtype=np.float32)
+    for i, axis in enumerate(('x', 'y', 'z')):
+        points[:, i] = vertices[axis]
+    return points
+
+def has_fileno(f):
+    try:
+        f.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return False
+    return True
+
+def read_with_plyfile(source):
+    from plyfile import PlyData
+    vertex = PlyData.read(source)['vertex']
+    return np.vstack([vertex['x'], vertex['y'], vertex['z']]).T.astype(np.float32)
+
+def read_file_points(source):
+    """read_ply_points for a path or a file object backed by a real file"""
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            fmt, elements, header_size = read_header(f)
+    else:
+        source.seek(0)
+        fmt, elements, header_size = read_header(source)
+    layout = vertex_layout(fmt, elements, header_size)
+    if layout is None:
+        if not isinstance(source, str):
+            source.seek(0)
+        return read_with_plyfile(source)
+    dtype, count, offset = layout
+    vertices = np.memmap(source, dtype=dtype, mode='r', offset=offset, shape=(count,))
+    return xyz_view(vertices)
+
+def read_ply_points(source):
+    """
+    Read the vertex positions of a PLY file as an (N, 3) float32 array.
+
+    Binary files are not parsed: only the header is read and the vertex
+    block is memory-mapped (files on disk) or wrapped (in-memory buffers)
+    with np.memmap / np.frombuffer. ASCII files fall back to plyfile.
+    source may be a path, bytes, or a binary file object.
+    """
+    if isinstance(source, str):
+        return read_file_points(source)
+
+    stream = None
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        buffer = source
+    elif isinstance(source, io.BytesIO):
+        # Returns the bytes the BytesIO was created from without a copy
+        # (getbuffer() would copy exactly those)
+        buffer = source.getvalue()
+        stream = source
+    elif getattr(source, '_rolled', True) and has_fileno(source):
+        # Spooled uploads that rolled over to a temp file, and other real
+        # files, are memory-mapped like a path
+        return read_file_points(source)
+    else:
+        # Spooled uploads still in memory: one read (fileno() would roll
+        # them over to disk)
+        buffer = source.read()
+
+    fmt, elements, header_size = read_buffer_header(buffer)
+    layout = vertex_layout(fmt, elements, header_size)
+    if layout is None:
+        if stream is None:
+            stream = io.BytesIO(buffer)  # shares the memory of a bytes object
+        stream.seek(0)
+        return read_with_plyfile(stream)
+    dtype, count, offset = layout
+    vertices = np.frombuffer(buffer, dtype=dtype, count=count, offset=offset)
+    return xyz_view(vertices)
@@ -0,0 +1,135 @@
+import io
+import numpy as np
+from PIL import Image, ImageDraw
+
+def voxel_downsample(points, max_points, sample_size=None, seed=0):
+    """
+    Reduce a point cloud to roughly max_points by averaging the points that
+    fall into the same voxel of a regular grid.
+
+    The voxel size is found by bisection on a random subsample, so the only
+    full-size work is one pass that buckets every point into its voxel.
+    """
+    points = np.asarray(points, dtype=np.float32)
+    if len(points) <= max_points:
+        return points
+
+    lo = points.min(axis=0)
+    extent = float(np.max(points.max(axis=0) - lo)) or 1.0
+
+    def voxel_ids(cloud, voxel_size):
+        cells = np.floor((cloud - lo) / voxel_size).astype(np.int64)
+        dims = cells.max(axis=0) + 1
+        return (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+
+    def occupied(ids):
+        ids = np.sort(ids)
+        return 1 + np.count_nonzero(ids[1:] != ids[:-1])
+
+    # Pick the voxel size on a subsample a few times larger than the budget.
+    # With ~4 sample points per full-size voxel nearly every occupied voxel is
+    # hit, so the sample's occupancy tracks the full cloud's
+    rng = np.random.default_rng(seed)
+    sample_size = sample_size or min(len(points), max_points * 4)
+    sample = points[rng.choice(len(points), sample_size, replace=False)]
+    small, large = extent / 4096, extent
+    for _ in range(12):
+        voxel_size = np.sqrt(small * large)  # bisect in log space
+        if occupied(voxel_ids(sample, voxel_size)) > max_points:
+            small = voxel_size
+        else:
+            large = voxel_size
+
+    # One full pass: sort points by voxel and average each run
+    ids = voxel_ids(points, large)
+    order = np.argsort(ids)
+    ids = ids[order]
+    starts = np.flatnonzero(np.concatenate(([True], ids[1:] != ids[:-1])))
+    counts = np.diff(np.append(starts, len(ids)))
+    sums = np.add.reduceat(points[order], starts, axis=0, dtype=np.float64)
+    centroids = (sums / counts[:, None]).astype(np.float32)
+
+    # Sparse regions the subsample missed can push the count over budget
+    if len(centroids) > max_points:
+        centroids = centroids[rng.choice(len(centroids), max_points, replace=False)]
+    return centroids
+
+def view_matrix(elev=30, azim=-60):
+    """Rotation taking world xyz to camera (right, up, towards viewer)"""
+    elev, azim = np.radians(elev), np.radians(azim)
+    # Same convention as matplotlib's Axes3D.view_init
+    forward = np.array([np.cos(elev) * np.cos(azim), np.cos(elev) * np.sin(azim), np.sin(elev)])
+    right = np.array([-np.sin(azim), np.cos(azim), 0.0])
+    up = np.cross(forward, right)
+    return np.stack([right, up, forward])
+
+def render_points(points, width=1000, height=600, projection='perspective', elev=30, azim=-60,
+                  color=(31, 119, 180), background=(255, 255, 255), point_size=2, title=None):
+    """
+    Project a point cloud into an (height, width, 3) uint8 image with a
+    z-buffer: for every pixel only the point nearest to the camera is drawn,
+    shaded darker with distance.
+    """
+    image = np.empty((height, width, 3), dtype=np.uint8)
+    image[:] = background
+    points = np.asarray(points, dtype=np.float32)
+    if len(points) == 0:
+        return image
+
+    # Center, scale to the unit sphere and rotate into camera space
+    center = (points.min(axis=0) + points.max(axis=0)) / 2
+    radius = float(np.max(np.linalg.norm(points - center, axis=1))) or 1.0
+    camera = ((points - center) / radius) @ view_matrix(elev, azim).T.astype(np.float32)
+    x, y, depth = camera[:, 0], camera[:, 1], camera[:, 2]
+
+    if projection == 'perspective':
+        distance = 3.0  # camera distance in unit-sphere radii
+        scale = distance / (distance - depth)
+        x = x * scale
+        y = y * scale
+        extent = distance / (distance - 1.0)
+    else:
+        extent = 1.0
+
+    # Fit the unit sphere into the image, keeping the aspect ratio
+    margin = 0.05
+    pixels_per_unit = (1 - 2 * margin) * min(width, height) / (2 * extent)
+    px = np.round(width / 2 + x * pixels_per_unit).astype(np.int64)
+    py = np.round(height / 2 - y * pixels_per_unit).astype(np.int64)
+
+    # Splat each point over a point_size x point_size square
+    if point_size > 1:
+        offsets = np.arange(point_size) - (point_size - 1) // 2
+        dx, dy = np.meshgrid(offsets, offsets)
+        px = (px[:, None] + dx.ravel()).ravel()
+        py = (py[:, None] + dy.ravel()).ravel()
+        depth = np.repeat(depth, point_size * point_size)
+
+    visible = (px >= 0) & (px < width) & (py >= 0) & (py < height)
+    pixel = py[visible] * width + px[visible]
+    depth = depth[visible]
+
+    # z-buffer: sort by pixel, nearest first, and keep the first hit per pixel
+    order = np.lexsort((-depth, pixel))
+    pixel, depth = pixel[order], depth[order]
+    first = np.ones(len(pixel), dtype=bool)
+    first[1:] = pixel[1:] != pixel[:-1]
+    pixel, depth = pixel[first], depth[first]
+
+    shade = 0.35 + 0.65 * (depth + 1) / 2  # depth is in [-1, 1]
+    colors = np.clip(np.outer(shade, color), 0, 255).astype(np.uint8)
+    image.reshape(-1, 3)[pixel] = colors
+
+    if title:
+        canvas = Image.fromarray(image)
+        ImageDraw.Draw(canvas).text((10, 10), title, fill=(0, 0, 0))
+        image = np.asarray(canvas)
+    return image
+
+def render_points_png(points, max_points=100000, **kwargs):
+    """Downsample to max_points, rasterize and encode as PNG"""
+    points = voxel_downsample(points, max_points)
+    buf = io.BytesIO()
+    Image.fromarray(render_points(points, **kwargs)).save(buf, format='PNG')
+    buf.seek(0)
+    return buf
@@ -1,9 +1,36 @@
 import numpy as np
-from PIL import Image
-import librosa
-from sklearn.preprocessing import StandardScaler
-import matplotlib.pyplot as plt
-import io
+import re
+import codecs
+from utils.waveform import render_waveform_png
+
+# Translation tables for removing special characters. ASCII runs go through
+# bytes.translate, which deletes everything that is neither alphanumeric nor
+# whitespace in one C pass; \x1c-\x1f count as whitespace for str.split()
+# but not bytes.split(), so they are mapped to spaces first.
+ASCII_TABLE = bytes(ord(' ') if 0x1c <= i <= 0x1f else i for i in range(256))
+ASCII_SPECIAL = bytes(i for i in range(128) if not (chr(i).isalnum() or chr(i).isspace()))
+NON_ASCII_RUN = re.compile(r'([^\x00-\x7f]+)')
+
+class UnicodeKeepTable(dict):
+    """str.translate table that fills itself in for unseen characters"""
+    def __missing__(self, code):
+        char = chr(code)
+        value = code if char.isalnum() or char.isspace() else None
+        self[code] = value
+        return value
+
+UNICODE_TABLE = UnicodeKeepTable()
+
+def remove_special_chars(text):
+    """Drop every character that is neither alphanumeric nor whitespace"""
+    if text.isascii():
+        return text.encode('ascii').translate(ASCII_TABLE, ASCII_SPECIAL).decode('ascii')
+    parts = NON_ASCII_RUN.split(text)
+    for i in range(0, len(parts), 2):
+        parts[i] = parts[i].encode('ascii').translate(ASCII_TABLE, ASCII_SPECIAL).decode('ascii')
+    for i in range(1, len(parts), 2):
+        parts[i] = parts[i].translate(UNICODE_TABLE)
+    return ''.join(parts)
 
 def preprocess_text(text):
     """
@@ -12,45 +39,79 @@ def preprocess_text(text):
     - Remove special characters
     - Remove extra whitespace
     """
-    # Convert to lowercase
-    text = text.lower()
-    # Remove special characters
-    text = ''.join(c for c in text if c.isalnum() or c.isspace())
-    # Remove extra whitespace
-    text = ' '.join(text.split())
-    return text
+    return ''.join(iter_preprocess_text([text]))
+
+def iter_preprocess_text(chunks, encoding='utf-8'):
+    """
+    Streaming version of preprocess_text. Takes an iterable of str or bytes
+    chunks and yields the preprocessed text piece by piece, so only one chunk
+    is held in memory. Joining the output gives the same result as
+    preprocess_text on the whole document (except for the context-dependent
+    lowercasing of a Greek final sigma that ends exactly on a chunk boundary).
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    started = False  # Output has been produced
+    pending_space = False  # Whitespace seen since the last output
+    
+    def pieces():
+        for chunk in chunks:
+            yield decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+        yield decoder.decode(b'', final=True)
+    
+    for piece in pieces():
+        # Convert to lowercase and remove special characters
+        text = remove_special_chars(piece.lower())
+        if not text:
+            continue
+        # Remove extra whitespace, remembering it at the chunk edges
+        words = text.split()
+        if not words:
+            pending_space = True
+            continue
+        output = ' '.join(words)
+        if started and (pending_space or text[0].isspace()):
+            output = ' ' + output
+        yield output
+        started = True
+        pending_space = text[-1].isspace()
 
-def preprocess_image(image):
+def preprocess_image(image, size=(224, 224)):
     """
-    Preprocess image data and return both processed image and display data
+    Preprocess image data and return both processed image and display data.
+    JPEGs are decoded at a reduced scale (still at least `size`) and the
+    pixels stay uint8 throughout.
     """
+    original_size = image.size
+    
+    # Let the JPEG decoder scale down by 1/2, 1/4 or 1/8 while decoding.
+    # Must run before the pixels are loaded; a no-op for other formats
+    if image.format == 'JPEG':
+        image.draft('RGB', size)
+    
     # Convert to RGB if needed
     if image.mode != 'RGB':
         image = image.convert('RGB')
     
-    # Resize to standard size (e.g., 224x224)
-    standard_size = (224, 224)
-    image = image.resize(standard_size)
-    
-    # Convert to numpy array and normalize
-    img_array = np.array(image)
-    img_array = img_array / 255.0  # Normalize to [0,1]
-    
-    # Convert back to PIL Image
-    normalized_image = Image.fromarray((img_array * 255).astype(np.uint8))
+    # Resize to standard size (e.g., 224x224); reducing_gap box-reduces
+    # large non-JPEG images first
+    image = image.resize(size, reducing_gap=3.0)
     
-    # Add display information
+    # Pixel range as it would be after dividing by 255, without a float copy
+    extrema = image.getextrema()
     display_info = {
-        'original_size': image.size,
-        'processed_size': standard_size,
-        'normalized_range': [img_array.min(), img_array.max()]
+        'original_size': original_size,
+        'processed_size': size,
+        'normalized_range': [min(lo for lo, _ in extrema) / 255.0,
+                             max(hi for _, hi in extrema) / 255.0]
     }
     
-    return normalized_image, display_info
+    return image, display_info
 
-def preprocess_audio(audio_data, sample_rate=22050):
+def preprocess_audio(audio_data, sample_rate=22050, render='envelope'):
     """
-    Preprocess audio data and return both processed audio and visualization
+    Preprocess audio data and return both processed audio and visualization.
+    render='envelope' rasterizes the peak envelope directly to a PNG, which
+    stays fast for long clips; render='matplotlib' plots every sample.
     """
     # Normalize amplitude
     audio_data = audio_data / np.max(np.abs(audio_data))
@@ -65,26 +126,47 @@ def preprocess_audio(audio_data, sample_rate=22050):
     audio_data = np.convolve(audio_data, np.ones(window_size)/window_size, mode='valid')
     
     # Add visualization
-    plt.figure(figsize=(10, 4))
-    plt.plot(audio_data)
-    plt.title('Processed Audio Waveform')
-    plt.xlabel('Sample')
-    plt.ylabel('Amplitude')
-    
-    # Save plot to bytes buffer
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png')
-    plt.close()
-    buf.seek(0)
+    if render == 'envelope':
+        return audio_data, render_waveform_png(audio_data)
+    
+    from utils.renderer import render as render_figure
+    
+    def draw(fig):
+        ax = fig.add_subplot()
+        ax.plot(audio_data)
+        ax.set_title('Processed Audio Waveform')
+        ax.set_xlabel('Sample')
+        ax.set_ylabel('Amplitude')
+    
+    buf = render_figure(draw, figsize=(10, 4), fmt='png', name='audio_preprocess')
     
     return audio_data, buf
 
-def preprocess_3d(points):
+def statistical_outlier_mask(points, k=16, std_ratio=2.0, chunk_size=100000):
+    """
+    Statistical outlier removal: a point is kept when the mean distance to
+    its k nearest neighbours is within mean + std_ratio * std of that
+    distance over the whole cloud. Neighbours come from a KD-tree queried
+    chunk_size points at a time, so memory stays at O(chunk_size * k) on
+    top of the tree.
+    """
+    from scipy.spatial import cKDTree
+    tree = cKDTree(points)
+    k = min(k, len(points) - 1)
+    mean_distances = np.empty(len(points), dtype=np.float64)
+    for start in range(0, len(points), chunk_size):
+        # k + 1 because every point is its own nearest neighbour
+        distances, _ = tree.query(points[start:start + chunk_size], k=k + 1, workers=-1)
+        mean_distances[start:start + chunk_size] = distances[:, 1:].mean(axis=1)
+    threshold = mean_distances.mean() + std_ratio * mean_distances.std()
+    return mean_distances <= threshold
+
+def preprocess_3d(points, outlier_method='std', k=16, std_ratio=2.0):
     """
     Preprocess 3D point cloud data:
     - Center the points
     - Normalize scale
-    - Remove outliers
+    - Remove outliers, either per axis ('std') or by neighbour distance ('sor')
     """
     # Center the points
     centroid = np.mean(points, axis=0)
@@ -94,10 +176,17 @@ def preprocess_3d(points):
     scale = np.max(np.abs(points))
     points = points / scale
     
+    if outlier_method == 'sor':
+        # Remove points far from their neighbours (KD-tree based)
+        if len(points) > k:
+            points = points[statistical_outlier_mask(points, k=k, std_ratio=std_ratio)]
+        return points
+    
     # Remove outliers (simple standard deviation based approach)
+    from sklearn.preprocessing import StandardScaler
     scaler = StandardScaler()
     scaled_points = scaler.fit_transform(points)
     mask = np.all(np.abs(scaled_points) < 3, axis=1)  # Remove points > 3 std devs
     points = points[mask]
     
-    return points
\ No newline at end of file
+    return points
@@ -0,0 +1,84 @@
+"""
+Matplotlib rendering without pyplot.
+
+pyplot keeps one global "current figure", which threads handling requests
+at the same time can draw into each other's plots. Here every render gets
+its own Figure with an Agg canvas. Figures are cleared and kept in a small
+per-thread pool instead of being rebuilt for every request.
+
+    buffer = render(lambda fig: fig.add_subplot().plot(y), name='waveform')
+"""
+import io
+import os
+import threading
+import time
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+RENDER_DPI = int(os.environ.get('RENDER_DPI', 100))
+# Output format of matplotlib visualizations: png, jpg or svg
+RENDER_FORMAT = os.environ.get('RENDER_FORMAT', 'png')
+# Idle figures kept per thread and figure size
+RENDER_POOL_SIZE = int(os.environ.get('RENDER_POOL_SIZE', 2))
+
+MIMETYPES = {'png': 'image/png', 'jpg': 'image/jpeg', 'jpeg': 'image/jpeg',
+             'svg': 'image/svg+xml'}
+
+_local = threading.local()
+_stats = {}
+_stats_lock = threading.Lock()
+
+def acquire_figure(figsize, dpi):
+    """A cleared figure from this thread's pool, or a new one"""
+    pool = getattr(_local, 'pool', None)
+    if pool is None:
+        pool = _local.pool = {}
+    idle = pool.get((figsize, dpi))
+    if idle:
+        return idle.pop()
+    fig = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(fig)
+    return fig
+
+def release_figure(fig, figsize, dpi):
+    fig.clear()
+    idle = _local.pool.setdefault((figsize, dpi), [])
+    if len(idle) < RENDER_POOL_SIZE:
+        idle.append(fig)
+
+def record(name, seconds):
+    with _stats_lock:
+        entry = _stats.setdefault(name, {'renders': 0, 'total_seconds': 0.0,
+                                         'max_seconds': 0.0, 'last_seconds': 0.0})
+        entry['renders'] += 1
+        entry['total_seconds'] += seconds
+        entry['max_seconds'] = max(entry['max_seconds'], seconds)
+        entry['last_seconds'] = seconds
+
+def render(draw, figsize=(10, 6), dpi=None, fmt=None, name='figure'):
+    """
+    Call draw(fig) on a pooled figure and return the saved image as a
+    BytesIO. The time taken is recorded under name, see render_stats().
+    """
+    dpi = dpi or RENDER_DPI
+    fmt = fmt or RENDER_FORMAT
+    start = time.perf_counter()
+    fig = acquire_figure(figsize, dpi)
+    try:
+        draw(fig)
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=fmt, dpi=dpi)
+        buffer.seek(0)
+    finally:
+        release_figure(fig, figsize, dpi)
+    record(name, time.perf_counter() - start)
+    return buffer
+
+def render_mimetype(fmt=None):
+    return MIMETYPES[fmt or RENDER_FORMAT]
+
+def render_stats():
+    """Render counts and timings per name, for this process"""
+    with _stats_lock:
+        return {name: dict(entry) for name, entry in _stats.items()}
@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+def hash_source(source, chunk_size=1024 * 1024):
+    """SHA-256 of a saved file path or a binary stream (rewound afterwards)"""
+    digest = hashlib.sha256()
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+    else:
+        source.seek(0)
+        for chunk in iter(lambda: source.read(chunk_size), b''):
+            digest.update(chunk)
+        source.seek(0)
+    return digest.hexdigest()
+
+def make_key(content_hash, input_type, action, params=None):
+    """Cache key for one upload processed with the given options"""
+    options = json.dumps({'input_type': input_type, 'action': action,
+                          'params': params or {}}, sort_keys=True)
+    return hashlib.sha256(f'{content_hash}:{options}'.encode()).hexdigest()
+
+class ResultCache:
+    """
+    Content-addressed cache of encoded responses.
+
+    Entries live in an in-memory LRU bounded by max_bytes. When disk_dir is
+    set, entries evicted from memory are written to a second LRU tier on disk
+    bounded by disk_max_bytes, and promoted back to memory on a hit.
+    """
+
+    def __init__(self, max_bytes=128 * 1024 * 1024, disk_dir=None,
+                 disk_max_bytes=1024 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+
+        self._memory = OrderedDict()  # key -> bytes
+        self._memory_bytes = 0
+        self._disk = OrderedDict()  # key -> size
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0, 'memory_hits': 0,
+                         'disk_hits': 0, 'evictions': 0}
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._load_disk_index()
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f'{key}.bin')
+
+    def _load_disk_index(self):
+        entries = []
+        for name in os.listdir(self.disk_dir):
+            if not name.endswith('.bin'):
+                continue
+            stat = os.stat(os.path.join(self.disk_dir, name))
+            entries.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+
+    def get(self, key):
+        """Return the cached bytes for key, or None"""
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.counters['hits'] += 1
+                self.counters['memory_hits'] += 1
+                return value
+            on_disk = key in self._disk
+
+        if on_disk:
+            try:
+                with open(self._disk_path(key), 'rb') as f:
+                    value = f.read()
+            except OSError:
+                value = None
+            if value is not None:
+                with self._lock:
+                    self.counters['hits'] += 1
+                    self.counters['disk_hits'] += 1
+                self.put(key, value)
+                return value
+
+        with self._lock:
+            self.counters['misses'] += 1
+        return None
+
+    def put(self, key, value):
+        """Store bytes under key, evicting least recently used entries"""
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= len(previous)
+            self._memory[key] = value
+            self._memory_bytes += len(value)
+
+            evicted = []
+            while self._memory_bytes > self.max_bytes:
+                old_key, old_value = self._memory.popitem(last=False)
+                self._memory_bytes -= len(old_value)
+                self.counters['evictions'] += 1
+                evicted.append((old_key, old_value))
+
+        if self.disk_dir:
+            for old_key, old_value in evicted:
+                self._write_disk(old_key, old_value)
+
+    def _write_disk(self, key, value):
+        if len(value) > self.disk_max_bytes:
+            return
+        with self._lock:
+            if key in self._disk:
+                self._disk.move_to_end(key)
+                return
+        # Write atomically so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(value)
+        os.replace(tmp_path, self._disk_path(key))
+
+        with self._lock:
+            self._disk[key] = len(value)
+            self._disk_bytes += len(value)
+            removed = []
+            while self._disk_bytes > self.disk_max_bytes:
+                old_key, size = self._disk.popitem(last=False)
+                self._disk_bytes -= size
+                removed.append(old_key)
+        for old_key in removed:
+            try:
+                os.remove(self._disk_path(old_key))
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats.update({
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'max_bytes': self.max_bytes,
+                'disk_entries': len(self._disk),
+                'disk_bytes': self._disk_bytes,
+            })
+        return stats
@@ -0,0 +1,131 @@
+"""
+Precomputed WordNet synonym index.
+
+Walking wordnet.synsets() and every lemma for each word is expensive, so the
+whole of WordNet is flattened once into {lowercase word: synonym tuple} and
+pickled. It is loaded on first use, or at startup when the text modality is
+in PRELOAD_MODALITIES. Pool workers started from a forkserver do not inherit
+the parent's copy and load the pickle themselves; preloading still makes
+sure it is built once, before any worker needs it.
+
+Build it ahead of time with:
+    python -m utils.synonym_index
+"""
+import functools
+import os
+import pickle
+import tempfile
+import threading
+
+INDEX_PATH = os.environ.get(
+    'SYNONYM_INDEX_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                 'data', 'wordnet_synonyms.pkl'))
+INDEX_VERSION = 1
+
+_index = None
+_lock = threading.Lock()
+
+def ensure_wordnet():
+    """Download the WordNet corpus if it is not installed yet"""
+    import nltk
+    try:
+        nltk.data.find('corpora/wordnet')
+    except LookupError:
+        nltk.download('wordnet')
+
+def build_index():
+    """Flatten WordNet into synonym, exception and suffix-rule tables"""
+    ensure_wordnet()
+    from nltk.corpus import wordnet
+
+    synonyms = {}
+    for synset in wordnet.all_synsets():
+        names = [lemma.name() for lemma in synset.lemmas()]
+        for name in names:
+            key = name.lower()
+            bucket = synonyms.setdefault(key, {})
+            for other in names:
+                if other.lower() != key:
+                    bucket[other] = None  # dict keeps first-seen order
+
+    # Irregular forms (e.g. 'geese' -> 'goose') and the suffix rules morphy
+    # uses, so inflected words can be resolved without loading WordNet
+    exceptions = {}
+    for pos_map in wordnet._exception_map.values():
+        for form, bases in pos_map.items():
+            exceptions.setdefault(form, {}).update(dict.fromkeys(bases))
+    substitutions = []
+    for rules in wordnet.MORPHOLOGICAL_SUBSTITUTIONS.values():
+        for rule in rules:
+            if rule not in substitutions:
+                substitutions.append(rule)
+
+    return {
+        'version': INDEX_VERSION,
+        'synonyms': {word: tuple(names) for word, names in synonyms.items()},
+        'exceptions': {form: tuple(bases) for form, bases in exceptions.items()},
+        'substitutions': tuple(substitutions),
+    }
+
+def save_index(index, path=INDEX_PATH):
+    """Pickle the index, replacing any existing file atomically"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+def load_index(path=INDEX_PATH):
+    """Load the pickled index, building and saving it on first use"""
+    global _index
+    if _index is not None:
+        return _index
+    with _lock:
+        if _index is None:
+            index = None
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    index = pickle.load(f)
+                if index.get('version') != INDEX_VERSION:
+                    index = None
+            if index is None:
+                print(f"Building WordNet synonym index at {path}")
+                index = build_index()
+                save_index(index, path)
+            _index = index
+    return _index
+
+def base_forms(word, index):
+    """Candidate dictionary forms of word, like wordnet.morphy across all POS"""
+    forms = [word]
+    forms.extend(index['exceptions'].get(word, ()))
+    for old, new in index['substitutions']:
+        if word.endswith(old):
+            forms.append(word[:len(word) - len(old)] + new)
+    return forms
+
+@functools.lru_cache(maxsize=65536)
+def get_synonyms(word):
+    """
+    Deduplicated synonyms of word, an empty tuple if there are none. Like
+    wordnet.synsets(), inflected forms also pick up their base form and its
+    synonyms ('dogs' -> 'dog', 'Canis_familiaris', ...).
+    """
+    index = load_index()
+    synonyms = index['synonyms']
+    key = word.lower()
+    merged = {}
+    for form in base_forms(key, index):
+        names = synonyms.get(form)
+        if names is None:
+            continue
+        if form != key:
+            merged[form] = None
+        merged.update(dict.fromkeys(names))
+    merged.pop(word, None)
+    return tuple(merged)
+
+if __name__ == '__main__':
+    save_index(build_index())
+    print(f"Saved WordNet synonym index to {INDEX_PATH}")